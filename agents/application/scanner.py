@@ -2,14 +2,19 @@
 # Fetches events per strategy, filters, runs Bouncer; only PASS candidates go to queue.
 import json
 import logging
+import re
 import time
 import queue
 import asyncio
 import threading
 import datetime as dt
-from typing import Dict, Tuple, Any
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Any, Optional
 import os
 
+
 logger = logging.getLogger("magnus.scanner")
 
 # Root path for imports when running from different directories
@@ -20,6 +25,95 @@ _root = _current.parents[2]
 if str(_root) not in sys.path:
     sys.path.insert(0, str(_root))
 
+from agents.polymarket.polymarket import Polymarket
+
+# Shared pool for blocking Polymarket calls (book/price/history) – created once, reused every round.
+try:
+    _FETCH_WORKERS = max(1, int(os.getenv("MAGNUS_SCANNER_FETCH_WORKERS", "16")))
+except ValueError:
+    _FETCH_WORKERS = 16
+_FETCH_POOL = ThreadPoolExecutor(max_workers=_FETCH_WORKERS, thread_name_prefix="magnus-scan")
+
+def _parse_json_list(raw):
+    """Gamma sends clobTokenIds/outcomePrices as JSON strings; return a list (or None if missing/invalid)."""
+    if isinstance(raw, list):
+        return raw
+    if not raw or not isinstance(raw, str):
+        return None
+    try:
+        val = json.loads(raw)
+    except ValueError:
+        return None
+    return val if isinstance(val, list) else None
+
+
+# Price-level events/markets (BTC above $X etc.): one pass over the title instead of a keyword loop.
+# "above $"/"below $" are covered by the bare "$".
+PRICE_MARKET_RE = re.compile(r"price of|finish (?:the )?week|\$", re.IGNORECASE)
+# Min days left (strict mode) by (is_price_event, high-risk category).
+_MIN_DAYS_TABLE = {(True, True): 1.2, (False, True): 1.0, (True, False): 0.8, (False, False): 0.8}
+
+
+@dataclass(slots=True)
+class Candidate:
+    """One scanned market outcome queued for the War Room. market_for_ai is the payload sent to evaluate_market."""
+    market_for_ai: dict
+    full_title: str
+    e_category: str
+    current_price: float
+    price_context: dict
+    token_id: str
+    m_id: str
+    # Only conditionId is read downstream (order options); the full Gamma market dict stays out of the queue.
+    condition_id: Optional[str] = None
+    spread_pct: Optional[float] = None
+    bid: Optional[float] = None
+    ask: Optional[float] = None
+    end_date_str: str = ""
+    event_id: str = ""
+    days_until_end: Optional[float] = None
+
+
+class CandidateQueue:
+    """
+    Bounded FIFO between scanner (producer) and War Room (consumer): deque + one Condition.
+    Same contract as queue.Queue for what we use (put_nowait/get/get_nowait/qsize, raises queue.Full/queue.Empty),
+    plus get_batch for the consumer. The producer never blocks, so there is no not_full condition to manage.
+    """
+
+    def __init__(self, maxsize: int = 500):
+        self.maxsize = max(1, int(maxsize))
+        self._items: deque = deque()
+        self._not_empty = threading.Condition(threading.Lock())
+
+    def put_nowait(self, item: Any) -> None:
+        with self._not_empty:
+            if len(self._items) >= self.maxsize:
+                raise queue.Full
+            self._items.append(item)
+            self._not_empty.notify()
+
+    def get(self, block: bool = True, timeout: float | None = None) -> Any:
+        with self._not_empty:
+            if not self._items:
+                if not block or not self._not_empty.wait_for(lambda: self._items, timeout):
+                    raise queue.Empty
+            return self._items.popleft()
+
+    def get_nowait(self) -> Any:
+        return self.get(block=False)
+
+    def get_batch(self, max_items: int, timeout: float | None = None) -> list:
+        """Wait up to timeout for the first item, then drain up to max_items under the same lock ([] on timeout)."""
+        with self._not_empty:
+            if not self._items and not self._not_empty.wait_for(lambda: self._items, timeout):
+                return []
+            n = min(max(1, int(max_items)), len(self._items))
+            return [self._items.popleft() for _ in range(n)]
+
+    def qsize(self) -> int:
+        return len(self._items)
+
 
 class MarketScanner(threading.Thread):
     """
@@ -30,12 +124,13 @@ class MarketScanner(threading.Thread):
 
     def __init__(
         self,
-        candidate_queue: queue.Queue,
+        candidate_queue: CandidateQueue,
         trade_manager: Any,
         *,
         strategies: list[str] | None = None,
         event_limit: int = 1000,
         dedup_ttl_seconds: int = 300,
+        dedup_max_entries: int = 10000,
         sleep_between_rounds_seconds: int = 25,
         daemon: bool = True,
     ):
@@ -46,89 +141,204 @@ class MarketScanner(threading.Thread):
         self.event_limit = event_limit
         self.dedup_ttl = dedup_ttl_seconds
         self.sleep_between_rounds = sleep_between_rounds_seconds
-        self._dedup: Dict[Tuple[str, str], float] = {}
+        # Insertion-ordered (oldest first) so expiry and the size cap only ever touch the front.
+        # Timestamps are time.monotonic() – TTL must not jump with wall-clock adjustments.
+        self._dedup: OrderedDict[Tuple[str, str], float] = OrderedDict()
+        self._dedup_max = max(1, int(dedup_max_entries))
         self._stop = threading.Event()
         # Verbose log (one 🔍 line per event) can be enabled with MAGNUS_VERBOSE_SCANNER=1.
         self.verbose = os.getenv("MAGNUS_VERBOSE_SCANNER", "0").strip().lower() in ("1", "true", "yes")
         # Relaxed mode: let more candidates through to War Room (softer liquidity and time-left requirements).
         self.relaxed_filters = os.getenv("MAGNUS_RELAX_SCANNER_FILTERS", "1").strip().lower() in ("1", "true", "yes")
+        # Bouncer calls are collected and run concurrently instead of one asyncio.run per token.
+        try:
+            self.bouncer_concurrency = max(1, int(os.getenv("MAGNUS_BOUNCER_CONCURRENCY", "32")))
+        except ValueError:
+            self.bouncer_concurrency = 32
+        # Long-lived event loop (own daemon thread) for Bouncer batches; War Room's pooled client for this loop
+        # keeps connections warm across rounds. Started on the first batch – never when the Bouncer is skipped.
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: threading.Thread | None = None
+        self._loop_lock = threading.Lock()
+        # Price zone on reference price (avg or current); MAGNUS_SCANNER_REF_PRICE_FILTER=0 for max candidates.
+        self.ref_price_filter_on = os.getenv("MAGNUS_SCANNER_REF_PRICE_FILTER", "1").strip().lower() in ("1", "true", "yes")
+        try:
+            self.min_ref_price = float(os.getenv("MAGNUS_SCANNER_MIN_PRICE", "0.01"))
+            self.max_ref_price = float(os.getenv("MAGNUS_SCANNER_MAX_PRICE", "0.99"))
+        except ValueError:
+            self.min_ref_price, self.max_ref_price = 0.01, 0.99
+        # Ask liquidity: FOK requires someone to sell.
+        try:
+            self.min_ask_multiplier = float(os.getenv("MAGNUS_MIN_ASK_MULTIPLIER", "0.5"))
+        except ValueError:
+            self.min_ask_multiplier = 0.5
+        # Relaxed mode: min ~0.08 days (~2h) left.
+        try:
+            self.min_days_relaxed = float(os.getenv("MAGNUS_SCANNER_MIN_DAYS_RELAXED", "0.08"))
+        except ValueError:
+            self.min_days_relaxed = 0.08
 
     def stop(self):
         self._stop.set()
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = self._loop_thread = None
+        if loop is None:
+            return
 
-    def _prune_dedup(self):
-        now = time.time()
-        cutoff = now - self.dedup_ttl
-        to_remove = [k for k, ts in self._dedup.items() if ts < cutoff]
-        for k in to_remove:
-            del self._dedup[k]
+        async def _shutdown():
+            try:
+                await self.trade.war_room.aclose_client()
+            finally:
+                loop.stop()
+
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(_shutdown(), loop)
+        if thread is not None:
+            thread.join(timeout=5.0)
+        if not loop.is_running():
+            loop.close()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Bouncer event loop, created and started on first use."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, name="magnus-scan-loop", daemon=True)
+                self._loop_thread.start()
+            return self._loop
 
     def _is_duplicate(self, m_id: str, token_id: str) -> bool:
         key = (str(m_id), str(token_id))
-        now = time.time()
-        if key in self._dedup and (now - self._dedup[key]) < self.dedup_ttl:
+        ts = self._dedup.get(key)
+        if ts is None:
+            return False
+        if (time.monotonic() - ts) < self.dedup_ttl:
             return True
+        del self._dedup[key]
         return False
 
     def _mark_enqueued(self, m_id: str, token_id: str):
-        self._dedup[(str(m_id), str(token_id))] = time.time()
+        key = (str(m_id), str(token_id))
+        now = time.monotonic()
+        self._dedup[key] = now
+        self._dedup.move_to_end(key)
+        # Drop expired entries from the front, then enforce the size cap (LRU).
+        cutoff = now - self.dedup_ttl
+        while self._dedup:
+            oldest_ts = next(iter(self._dedup.values()))
+            if oldest_ts >= cutoff and len(self._dedup) <= self._dedup_max:
+                break
+            self._dedup.popitem(last=False)
+
+    def _run_bouncer_batch(self, pending: list) -> list:
+        """Run Bouncer for all pending candidates concurrently. Returns one bool per candidate (error = FAIL)."""
+        if self._stop.is_set():
+            return [False] * len(pending)
+        war_room = self.trade.war_room
+        limit = self.bouncer_concurrency
+
+        async def _gather():
+            # war_room._grok_bouncer uses War Room's pooled client for this loop – reused for every batch.
+            sem = asyncio.Semaphore(limit)
+
+            async def _one(c):
+                async with sem:
+                    return await war_room._grok_bouncer(c.full_title, c.end_date_str, category=c.e_category)
+
+            return await asyncio.gather(*(_one(c) for c in pending), return_exceptions=True)
+
+        # Each Bouncer call times out after 12s; allow one wave per semaphore slot plus margin.
+        waves = -(-len(pending) // limit)
+        fut = asyncio.run_coroutine_threadsafe(_gather(), self._get_loop())
+        try:
+            results = fut.result(timeout=20.0 * waves + 10.0)
+        except Exception as e:
+            fut.cancel()
+            logger.warning("⚠️ [Scanner] Bouncer batch failed (%d candidates): %s", len(pending), str(e)[:80])
+            return [False] * len(pending)
+        verdicts = []
+        for c, res in zip(pending, results):
+            if isinstance(res, BaseException):
+                logger.warning("⚠️ [Scanner] Bouncer error for %s…: %s", c.full_title[:40], str(res)[:80])
+                verdicts.append(False)
+            else:
+                verdicts.append(bool(res))
+        return verdicts
+
+    def _fetch_token_bundle(self, token_id, need_price: bool = True) -> tuple:
+        """Fetch price (optional) and book for one token in parallel. Returns (price, bid, ask, liq)."""
+        pm = self.trade.polymarket
+        f_price = _FETCH_POOL.submit(pm.get_buy_price, token_id) if need_price else None
+        bid, ask, liq = pm.get_book(token_id)
+        price = f_price.result() if f_price is not None else None
+        return price, bid, ask, liq
 
     def _build_event_markets_overview(self, markets: list, event_title: str) -> list:
-        """Get price (and spread) for all markets in event. Uses Gamma outcomePrices (0–1, like web) when available, else CLOB."""
-        overview = []
+        """Get price (and spread) for all markets in event. Uses Gamma outcomePrices (0–1, like web) when available, else CLOB.
+        Books (and missing CLOB prices) for all tokens in the event are fetched in parallel."""
+        pending = []  # (m_id, group_title, outcome_label, token_id, gamma_price)
         for market_data in markets:
             m_id = str(market_data.get("id"))
-            t_ids_raw = market_data.get("clobTokenIds")
-            if not t_ids_raw:
+            t_ids = market_data.get("clobTokenIds")
+            if not t_ids:
                 continue
-            t_ids = json.loads(t_ids_raw) if isinstance(t_ids_raw, str) else t_ids_raw
             group_title = market_data.get("groupItemTitle") or "Yes"
             outcome_prices = market_data.get("outcomePrices")
-            if isinstance(outcome_prices, str):
-                try:
-                    outcome_prices = json.loads(outcome_prices)
-                except Exception:
-                    outcome_prices = None
             for token_idx, token_id in enumerate(t_ids):
                 outcome_label = (
                     "Yes"
                     if token_idx == 0 and len(t_ids) == 2
                     else ("No" if token_idx == 1 and len(t_ids) == 2 else f"Outcome{token_idx}")
                 )
-                try:
-                    price = None
-                    if outcome_prices and token_idx < len(outcome_prices):
-                        try:
-                            p = outcome_prices[token_idx]
-                            price = float(p) if p is not None else None
-                        except (TypeError, ValueError):
-                            pass
-                    if price is None or price == 0:
-                        price = self.trade.polymarket.get_buy_price(token_id)
+                price = None
+                if outcome_prices and token_idx < len(outcome_prices):
+                    try:
+                        p = outcome_prices[token_idx]
+                        price = float(p) if p is not None else None
+                    except (TypeError, ValueError):
+                        pass
+                pending.append((m_id, group_title, outcome_label, token_id, price))
+        if not pending:
+            return []
+
+        pm = self.trade.polymarket
+        books = list(_FETCH_POOL.map(pm.get_book, [row[3] for row in pending]))
+        missing = [row[3] for row in pending if not row[4]]
+        clob_prices = dict(zip(missing, _FETCH_POOL.map(pm.get_buy_price, missing))) if missing else {}
+
+        overview = []
+        for (m_id, group_title, outcome_label, token_id, price), (bid, ask, _liq) in zip(pending, books):
+            try:
+                # Coerce once; everything below works on plain floats.
+                bid = float(bid) if bid is not None else None
+                ask = float(ask) if ask is not None else None
+                if price is None or price == 0:
+                    price = clob_prices.get(token_id)
+                if price and price > 1.0:
+                    price = price / 100.0
+                if (price is None or price == 0) and bid is not None and ask is not None:
+                    price = (bid + ask) / 2
                     if price and price > 1.0:
                         price = price / 100.0
-                    bid, ask, _liq = self.trade.polymarket.get_book(token_id)
-                    if (price is None or price == 0) and bid is not None and ask is not None:
-                        price = (float(bid) + float(ask)) / 2
-                        if price and price > 1.0:
-                            price = price / 100.0
-                    spread_pct = None
-                    if bid and ask and (float(bid) + float(ask)) > 0:
-                        mid = (float(bid) + float(ask)) / 2
-                        spread_pct = round((float(ask) - float(bid)) / mid * 100, 1)
-                    overview.append({
-                        "market_id": m_id,
-                        "groupItemTitle": group_title,
-                        "outcome": outcome_label,
-                        "token_id": str(token_id),
-                        "price": round(float(price), 3) if price else 0,
-                        "spread_pct": spread_pct,
-                        "bid": float(bid) if bid is not None else None,
-                        "ask": float(ask) if ask is not None else None,
-                        "bid_liquidity": float(_liq) if _liq is not None else 0.0,
-                    })
-                except Exception:
-                    continue
+                spread_pct = None
+                if bid and ask:
+                    mid = (bid + ask) / 2
+                    if mid > 0:
+                        spread_pct = round((ask - bid) / mid * 100, 1)
+                overview.append({
+                    "market_id": m_id,
+                    "groupItemTitle": group_title,
+                    "outcome": outcome_label,
+                    "token_id": str(token_id),
+                    "price": round(float(price), 3) if price else 0,
+                    "spread_pct": spread_pct,
+                    "bid": bid,
+                    "ask": ask,
+                    "bid_liquidity": float(_liq) if _liq is not None else 0.0,
+                })
+            except Exception:
+                continue
         return overview
 
     def _format_event_markets_for_prompt(self, overview: list, event_title: str) -> str:
@@ -151,38 +361,57 @@ class MarketScanner(threading.Thread):
             try:
                 self._run_one_round()
             except Exception as e:
-                print(f"\n⚠️ [Scanner] Round error: {e}")
-                logger.exception("Scanner round error")
-                import traceback
-                traceback.print_exc()
-            self._prune_dedup()
+                logger.exception("⚠️ [Scanner] Round error: %s", e)
             if self._stop.wait(timeout=self.sleep_between_rounds):
                 break
 
     def _run_one_round(self):
+        # Hot-loop lookups bound once per round (attributes/config don't change while a round runs).
+        trade = self.trade
+        pm = trade.polymarket
+        get_price_history = pm.get_price_history
+        get_ask_liquidity = pm._get_ask_liquidity_usdc
+        history_stats = trade._history_stats
+        price_context_of = trade._price_context
+        stopped = self._stop.is_set
+        relaxed = self.relaxed_filters
+        min_p = getattr(trade, "min_entry_price", 0.001)
+        max_p = getattr(trade, "max_entry_price", 0.999)
+        max_spread = getattr(trade, "max_spread_pct", 95.0)
+        min_bid_liq = trade.min_bid_liquidity_usdc
+        min_range_pct = trade.min_range_pct
+        min_change_1h = trade.min_change_1h_pct
+        ref_filter_on, min_ref, max_ref = self.ref_price_filter_on, self.min_ref_price, self.max_ref_price
+        ask_mult = self.min_ask_multiplier
+        # One clock read per round for days-left (rounded to 0.1 day, so round duration doesn't matter)
+        now_utc = dt.datetime.now(dt.timezone.utc)
+
         for strategy in self.strategies:
-            if self._stop.is_set():
+            if stopped():
                 return
             try:
-                events = self.trade.polymarket.get_all_events(strategy=strategy, limit=self.event_limit)
+                events = pm.get_all_events(strategy=strategy, limit=self.event_limit)
             except Exception as e:
-                print(f"\n⚠️ [Scanner] get_all_events({strategy}) error: {e}")
+                logger.warning("⚠️ [Scanner] get_all_events(%s) error: %s", strategy, e)
                 continue
             if not events:
                 continue
 
-            from agents.polymarket.polymarket import Polymarket
             for ev in events:
                 raw_cat = ev.get("category")
                 # Gamma can return a list of tags as "category" – normalise to label.
                 if not isinstance(raw_cat, str) or raw_cat in ("", "Unknown"):
                     ev["category"] = Polymarket.extract_category(ev)
 
-            preferred = self.trade.preferred_categories
-            events.sort(key=lambda e: 0 if e.get("category", "") in preferred else 1)
+            # Preferred categories first (stable two-bucket partition, no per-element sort key).
+            preferred = trade.preferred_categories
+            if preferred:
+                head = [e for e in events if e.get("category", "") in preferred]
+                if head:
+                    events = head + [e for e in events if e.get("category", "") not in preferred]
 
             n_events = len(events)
-            print(f"\n📡 SCANNER ({strategy}): {n_events} events – processing…", flush=True)
+            logger.info("📡 SCANNER (%s): %d events – processing…", strategy, n_events)
             enqueued_this_round = 0
             to_bouncer = 0
             bouncer_pass_count = 0
@@ -195,11 +424,40 @@ class MarketScanner(threading.Thread):
             skip_dup = 0
             skip_queue_full = 0
             skip_ask_liq = 0
+            pending_bouncer: list = []
+
+            def _enqueue(candidate: Candidate) -> None:
+                nonlocal skip_dup, skip_queue_full, enqueued_this_round
+                m_id, token_id = candidate.m_id, candidate.token_id
+                if self._is_duplicate(m_id, token_id):
+                    skip_dup += 1
+                    return
+                try:
+                    self.candidate_queue.put_nowait(candidate)
+                    self._mark_enqueued(m_id, token_id)
+                    enqueued_this_round += 1
+                    logger.info("      → Queue: %s @ %.2f", candidate.full_title[:58], candidate.current_price)
+                except queue.Full:
+                    skip_queue_full += 1
+
+            def _flush_bouncer() -> None:
+                nonlocal bouncer_pass_count
+                if not pending_bouncer:
+                    return
+                batch = pending_bouncer[:]
+                pending_bouncer.clear()
+                for candidate, ok in zip(batch, self._run_bouncer_batch(batch)):
+                    if not ok:
+                        logger.info("      ⛔ Bouncer FAIL: %s", candidate.full_title[:60])
+                        continue
+                    bouncer_pass_count += 1
+                    _enqueue(candidate)
+
             for count, event in enumerate(events, 1):
-                if self._stop.is_set():
+                if stopped():
                     return
                 if count == n_events or (n_events <= 50 and count % 5 == 0) or (n_events > 50 and count % 100 == 0):
-                    print(f"   [Scanner] {count}/{n_events} events…", flush=True)
+                    logger.info("   [Scanner] %d/%d events…", count, n_events)
                 try:
                     e_title = event.get("title", "Untitled")
                     e_category = event.get("category") or "Unknown"
@@ -210,12 +468,13 @@ class MarketScanner(threading.Thread):
                     if not markets:
                         continue
                     # Minimal cleanup at event level: skip "up or down" noise and manipulation-suspect titles.
-                    if "up or down" in e_title.lower():
+                    e_title_lower = e_title.lower()
+                    if "up or down" in e_title_lower:
                         continue
-                    if self.trade._is_manipulation_suspect(e_title):
+                    if trade._is_manipulation_suspect(e_title):
                         continue
                     # Volume/liquidity: high volume but thin orderbook = suspected wash trading.
-                    if self.trade.skip_manipulation_suspect:
+                    if trade.skip_manipulation_suspect:
                         vol = event.get("volume24hr") or event.get("volume_24hr") or 0
                         liq = event.get("liquidity") or 0
                         try:
@@ -225,32 +484,57 @@ class MarketScanner(threading.Thread):
                         except (TypeError, ValueError):
                             pass
 
+                    # Cheap per-market gate before any book/price calls: markets with an open position are skipped
+                    # (previously traded markets may still enter, see Trade._allow_market_scan).
+                    viable_markets = [m for m in markets if trade._allow_market_scan(str(m.get("id")))]
+                    skip_scan += len(markets) - len(viable_markets)
+                    if not viable_markets:
+                        continue
+                    # Parse Gamma's JSON-string fields once; overview and token loop both use the lists.
+                    for m in viable_markets:
+                        m["clobTokenIds"] = _parse_json_list(m.get("clobTokenIds"))
+                        m["outcomePrices"] = _parse_json_list(m.get("outcomePrices"))
+
+                    # Time left depends only on the event: filter before any book/history calls.
+                    is_price_event = PRICE_MARKET_RE.search(e_title) is not None
+                    min_days = (
+                        self.min_days_relaxed
+                        if relaxed
+                        else _MIN_DAYS_TABLE[(is_price_event, e_category in trade.high_risk_categories)]
+                    )
+                    end_date_str = event.get("endDate") or "Unknown"
+                    days_until_end = trade._days_until_end(end_date_str, now_utc)
+                    if days_until_end is not None and days_until_end < min_days:
+                        skip_days += sum(len(m["clobTokenIds"] or ()) for m in viable_markets)
+                        continue
+
                     # Keep log clean: default = no per-event line. Set MAGNUS_VERBOSE_SCANNER=1 to show.
                     if self.verbose:
                         cat_tag = f"[{e_category}]" if e_category and e_category != "Unknown" else ""
-                        print(f"   🔍 {cat_tag} {e_title[:70]}")
+                        logger.info("   🔍 %s %s", cat_tag, e_title[:70])
 
                     # Research: all markets in event (prices) to find best profit potential
-                    event_markets_overview = self._build_event_markets_overview(markets, e_title)
-                    event_markets_summary_str = self._format_event_markets_for_prompt(event_markets_overview, e_title)
+                    # Single-market events add no cross-market context; the token loop fetches those books itself.
+                    if len(viable_markets) > 1:
+                        event_markets_overview = self._build_event_markets_overview(viable_markets, e_title)
+                        event_markets_summary_str = self._format_event_markets_for_prompt(event_markets_overview, e_title)
+                    else:
+                        event_markets_overview = []
+                        event_markets_summary_str = ""
                     overview_by_token = {str(r["token_id"]): r for r in event_markets_overview}
                     event_id = str(event.get("id") or "")
 
-                    for market_data in markets:
-                        if self._stop.is_set():
+                    for market_data in viable_markets:
+                        if stopped():
                             return
                         m_id = str(market_data.get("id"))
-                        if not self.trade._allow_market_scan(m_id):
-                            skip_scan += 1
-                            continue
 
-                        t_ids_raw = market_data.get("clobTokenIds")
-                        if not t_ids_raw:
+                        t_ids = market_data.get("clobTokenIds")
+                        if not t_ids:
                             continue
-                        t_ids = json.loads(t_ids_raw) if isinstance(t_ids_raw, str) else t_ids_raw
 
                         for token_idx, token_id in enumerate(t_ids):
-                            if self._stop.is_set():
+                            if stopped():
                                 return
                             try:
                                 tid_str = str(token_id)
@@ -260,27 +544,26 @@ class MarketScanner(threading.Thread):
                                     bid = row.get("bid")
                                     ask = row.get("ask")
                                     bid_liquidity = float(row.get("bid_liquidity") or 0)
+                                    # Overview rows already hold float bid/ask.
                                     if current_price == 0 and bid is not None and ask is not None:
-                                        current_price = (float(bid) + float(ask)) / 2
+                                        current_price = (bid + ask) / 2
                                     spread_pct = row.get("spread_pct")
                                 else:
                                     current_price = None
                                     op = market_data.get("outcomePrices")
-                                    if isinstance(op, str):
-                                        try:
-                                            op = json.loads(op)
-                                        except Exception:
-                                            op = None
                                     if op and token_idx < len(op):
                                         try:
                                             current_price = float(op[token_idx])
                                         except (TypeError, ValueError):
                                             pass
+                                    # Not in overview: fetch price and book for this token in parallel.
+                                    clob_price, bid, ask, bid_liquidity = self._fetch_token_bundle(
+                                        token_id, need_price=current_price is None
+                                    )
                                     if current_price is None:
-                                        current_price = self.trade.polymarket.get_buy_price(token_id)
+                                        current_price = clob_price
                                     if current_price > 1.0:
                                         current_price = current_price / 100.0
-                                    bid, ask, bid_liquidity = self.trade.polymarket.get_book(token_id)
                                     if current_price == 0 and bid is not None and ask is not None:
                                         mid_p = (bid + ask) / 2
                                         current_price = mid_p / 100.0 if mid_p > 1.0 else mid_p
@@ -288,81 +571,44 @@ class MarketScanner(threading.Thread):
                                     if bid and ask and (bid + ask) > 0:
                                         mid = (bid + ask) / 2
                                         spread_pct = round((ask - bid) / mid * 100, 1)
-                                min_p = getattr(self.trade, "min_entry_price", 0.001)
-                                max_p = getattr(self.trade, "max_entry_price", 0.999)
                                 if current_price < min_p or current_price > max_p:
                                     skip_price += 1
                                     if self.verbose and skip_price <= 3:
-                                        print(f"      [price skip] raw={current_price} (min={min_p}, max={max_p})", flush=True)
+                                        logger.info("      [price skip] raw=%s (min=%s, max=%s)", current_price, min_p, max_p)
                                     continue
                                 # Liquidity filter: thin orderbook → hard to sell without slippage.
                                 # In relaxed mode: allow all with some bid liquidity (> 0); else use configured limit.
-                                if self.relaxed_filters:
+                                if relaxed:
                                     if bid_liquidity <= 0:
                                         skip_liquidity += 1
                                         continue
                                 else:
-                                    if bid_liquidity < self.trade.min_bid_liquidity_usdc:
+                                    if bid_liquidity < min_bid_liq:
                                         skip_liquidity += 1
                                         continue
                                 # Spread: Quant almost always REJECTs at >15–25%; filter early to save War Room calls
-                                max_spread = getattr(self.trade, "max_spread_pct", 95.0)
                                 if spread_pct is not None and spread_pct > max_spread:
                                     skip_spread += 1
                                     continue
 
-                                history = self.trade.polymarket.get_price_history(token_id)
-                                stats = self.trade.war_room._process_history(history)
-                                end_date_str = event.get("endDate") or "Unknown"
-                                days_until_end, price_context = self.trade._price_and_time_context(
-                                    current_price, stats, end_date_str
-                                )
-                                # Time left – slightly softer so more reach Bouncer/Quant
-                                e_title_lower = e_title.lower()
-                                is_price_event = any(
-                                    kw in e_title_lower
-                                    for kw in ["price of", "above $", "below $", "finish week", "finish the week"]
-                                ) or "$" in e_title
-                                min_days = 0.8
-                                if is_price_event and e_category in self.trade.high_risk_categories:
-                                    min_days = 1.2
-                                elif e_category in self.trade.high_risk_categories:
-                                    min_days = 1.0
-                                # In relaxed mode: let more through – min ~0.08 days (~2h); else 0.2 days.
-                                if days_until_end is not None:
-                                    if self.relaxed_filters:
-                                        min_days_relaxed = 0.08
-                                        try:
-                                            min_days_relaxed = float(os.getenv("MAGNUS_SCANNER_MIN_DAYS_RELAXED", "0.08"))
-                                        except ValueError:
-                                            pass
-                                        if days_until_end < min_days_relaxed:
-                                            skip_days += 1
-                                            continue
-                                    else:
-                                        if days_until_end < min_days:
-                                            skip_days += 1
-                                            continue
+                                # History only for tokens that passed the cheap price/liquidity/spread filters.
+                                history = get_price_history(token_id)
+                                stats = history_stats(token_id, history)
+                                price_context = price_context_of(current_price, stats)
                                 range_pct = price_context.get("range_pct") or 0
-                                if range_pct < self.trade.min_range_pct:
+                                if range_pct < min_range_pct:
                                     skip_range += 1
                                     continue
                                 # Price zone: configurable; set MAGNUS_SCANNER_REF_PRICE_FILTER=0 for max candidates.
-                                ref_price_filter_on = os.getenv("MAGNUS_SCANNER_REF_PRICE_FILTER", "1").strip().lower() in ("1", "true", "yes")
-                                if ref_price_filter_on:
+                                if ref_filter_on:
                                     avg_price = float(stats.get("avg") or 0.0)
                                     ref_price = avg_price if avg_price > 0 else current_price
-                                    try:
-                                        min_ref = float(os.getenv("MAGNUS_SCANNER_MIN_PRICE", "0.01"))
-                                        max_ref = float(os.getenv("MAGNUS_SCANNER_MAX_PRICE", "0.99"))
-                                    except ValueError:
-                                        min_ref, max_ref = 0.01, 0.99
                                     if not (min_ref <= ref_price <= max_ref):
                                         skip_price += 1
                                         continue
-                                if self.trade.min_change_1h_pct > 0:
+                                if min_change_1h > 0:
                                     change_1h = price_context.get("change_1h")
-                                    if change_1h is None or abs(float(change_1h)) < self.trade.min_change_1h_pct:
+                                    if change_1h is None or abs(float(change_1h)) < min_change_1h:
                                         continue
 
                                 outcome_label = (
@@ -387,66 +633,45 @@ class MarketScanner(threading.Thread):
                                     "spread_pct": spread_pct,
                                     "bid": bid if bid else None,
                                     "ask": ask if ask else None,
-                                    "uncertain_market": self.trade.uncertain_market,
+                                    "uncertain_market": trade.uncertain_market,
                                     "event_markets_context": event_markets_summary_str,
                                 }
-                                candidate = {
-                                    "market_for_ai": market_for_ai,
-                                    "full_title": full_title,
-                                    "e_category": e_category,
-                                    "current_price": current_price,
-                                    "price_context": price_context,
-                                    "token_id": token_id,
-                                    "m_id": m_id,
-                                    "market_data": market_data,
-                                    "spread_pct": spread_pct,
-                                    "bid": bid,
-                                    "ask": ask,
-                                    "end_date_str": end_date_str,
-                                    "strategy": strategy,
-                                    "event_id": event_id,
-                                }
+                                candidate = Candidate(
+                                    market_for_ai=market_for_ai,
+                                    full_title=full_title,
+                                    e_category=e_category,
+                                    current_price=current_price,
+                                    price_context=price_context,
+                                    token_id=token_id,
+                                    m_id=m_id,
+                                    condition_id=market_data.get("conditionId"),
+                                    spread_pct=spread_pct,
+                                    bid=bid,
+                                    ask=ask,
+                                    end_date_str=end_date_str,
+                                    event_id=event_id,
+                                    days_until_end=days_until_end,
+                                )
 
                                 # Ask liquidity: FOK requires someone to sell. Configurable via MAGNUS_MIN_ASK_MULTIPLIER.
-                                ask_liq, best_ask = self.trade.polymarket._get_ask_liquidity_usdc(token_id)
-                                try:
-                                    ask_mult = float(os.getenv("MAGNUS_MIN_ASK_MULTIPLIER", "0.5"))
-                                except ValueError:
-                                    ask_mult = 0.5
+                                ask_liq, best_ask = get_ask_liquidity(token_id, use_cache=True)
                                 min_ask_usdc = max(1.0, ask_mult * 5.0 * (best_ask or current_price or 0.01))
                                 if ask_liq < min_ask_usdc:
                                     skip_ask_liq += 1
                                     continue
-                                # Bouncer (Option A): only PASS candidates go to queue (can be disabled with MAGNUS_SKIP_BOUNCER_IN_SCANNER=1)
+                                # Bouncer (Option A): only PASS candidates go to queue (can be disabled with MAGNUS_SKIP_BOUNCER_IN_SCANNER=1).
+                                # Bouncer calls are batched: flushed concurrently once bouncer_concurrency candidates are pending.
                                 to_bouncer += 1
-                                if self.trade.skip_bouncer_in_scanner:
-                                    bouncer_ok = True
-                                    bouncer_pass_count += 1
-                                else:
-                                    try:
-                                        bouncer_ok = asyncio.run(
-                                            self.trade.war_room._grok_bouncer(
-                                                full_title, end_date_str, category=e_category
-                                            )
-                                        )
-                                    except Exception as bouncer_err:
-                                        print(f"\n⚠️ [Scanner] Bouncer error for {full_title[:40]}…: {(str(bouncer_err)[:80])}")
-                                        bouncer_ok = False
-                                    if not bouncer_ok:
-                                        print(f"      ⛔ Bouncer FAIL: {full_title[:60]}")
-                                        continue
+                                if trade.skip_bouncer_in_scanner:
                                     bouncer_pass_count += 1
-
+                                    _enqueue(candidate)
+                                    continue
                                 if self._is_duplicate(m_id, token_id):
                                     skip_dup += 1
                                     continue
-                                try:
-                                    self.candidate_queue.put_nowait(candidate)
-                                    self._mark_enqueued(m_id, token_id)
-                                    enqueued_this_round += 1
-                                    print(f"      → Queue: {full_title[:58]} @ {current_price:.2f}", flush=True)
-                                except queue.Full:
-                                    skip_queue_full += 1
+                                pending_bouncer.append(candidate)
+                                if len(pending_bouncer) >= self.bouncer_concurrency:
+                                    _flush_bouncer()
 
                             except Exception as tok_err:
                                 # Single token errors should not stop the whole round
@@ -455,6 +680,12 @@ class MarketScanner(threading.Thread):
                 except Exception as ev_err:
                     continue
 
+            # Remaining Bouncer candidates for this strategy (partial batch).
+            try:
+                _flush_bouncer()
+            except Exception as e:
+                logger.warning("⚠️ [Scanner] Bouncer batch error: %s", e)
+
             # Formatted summary – always visible after each round (flush so it doesn't get stuck in buffer)
             parts = []
             if skip_scan: parts.append(f"scan={skip_scan}")
@@ -467,59 +698,23 @@ class MarketScanner(threading.Thread):
             if skip_dup: parts.append(f"dup={skip_dup}")
             if skip_queue_full: parts.append(f"full={skip_queue_full}")
 
-            # region agent log
-            try:
-                import json as _json  # local alias for debug logging
-                with open("/home/kim/agents/.cursor/debug-ed1d60.log", "a", encoding="utf-8") as _fdbg:
-                    _fdbg.write(
-                        _json.dumps(
-                            {
-                                "sessionId": "ed1d60",
-                                "runId": "pre-fix",
-                                "hypothesisId": "H1",
-                                "location": "scanner.py:_run_one_round",
-                                "message": "scanner_round_summary",
-                                "data": {
-                                    "strategy": strategy,
-                                    "n_events": n_events,
-                                    "to_bouncer": to_bouncer,
-                                    "enqueued": enqueued_this_round,
-                                    "skip_scan": skip_scan,
-                                    "skip_price": skip_price,
-                                    "skip_liquidity": skip_liquidity,
-                                    "skip_days": skip_days,
-                                    "skip_range": skip_range,
-                                    "skip_spread": skip_spread,
-                                    "skip_dup": skip_dup,
-                                    "skip_queue_full": skip_queue_full,
-                                    "skip_ask_liq": skip_ask_liq,
-                                },
-                                "timestamp": int(time.time() * 1000),
-                            }
-                        )
-                        + "\n"
-                    )
-            except Exception:
-                pass
-            # endregion
-
-            _f = lambda s: print(s, flush=True)
-            _f("\n" + "─" * 60)
-            _f("📡 SCANNER – result (" + strategy + ")")
-            _f("   Found: " + str(n_events) + " events, " + str(to_bouncer) + " token(s) passed pre-filter.")
+            # One record for the whole block so it stays together in the log.
+            lines = ["─" * 60, "📡 SCANNER – result (" + strategy + ")"]
+            lines.append("   Found: " + str(n_events) + " events, " + str(to_bouncer) + " token(s) passed pre-filter.")
             if enqueued_this_round > 0:
                 qsize = self.candidate_queue.qsize()
-                _f("   → To analysis (queue): " + str(enqueued_this_round) + " candidate(s). War Room picks next batch (queue now has " + str(qsize) + ").")
+                lines.append("   → To analysis (queue): " + str(enqueued_this_round) + " candidate(s). War Room picks next batch (queue now has " + str(qsize) + ").")
             else:
                 why = []
                 if skip_dup: why.append("dup")
                 if skip_queue_full: why.append("queue full")
-                _f("   → To analysis: 0" + (" (" + ", ".join(why) + ")" if why else "") + ".")
+                lines.append("   → To analysis: 0" + (" (" + ", ".join(why) + ")" if why else "") + ".")
             if parts:
-                _f("   Filtered out: " + ", ".join(parts))
+                lines.append("   Filtered out: " + ", ".join(parts))
             if to_bouncer == 0 and skip_price > 0:
-                _f("   Tip: many skipped on price – run with MAGNUS_VERBOSE_SCANNER=1 to see examples, or set MIN/MAX_ENTRY_PRICE in .env.")
-            _f("─" * 60)
+                lines.append("   Tip: many skipped on price – run with MAGNUS_VERBOSE_SCANNER=1 to see examples, or set MIN/MAX_ENTRY_PRICE in .env.")
+            lines.append("─" * 60)
+            logger.info("\n%s", "\n".join(lines))
             if self._stop.is_set():
                 return
             # Single pause per round happens in run() via _stop.wait() – avoid double sleep
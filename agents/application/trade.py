@@ -1,13 +1,16 @@
 import sys
 import os
+import atexit
+import re
 import time
 import json
 import math
-import queue
 import threading
-import traceback
 import warnings
+import functools
 import datetime as dt
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from types import SimpleNamespace
 from typing import Dict, List
@@ -29,13 +32,107 @@ from agents.war_room import MagnusWarRoom
 from agents.risk_manager import RiskManager
 from agents.polymarket.polymarket import Polymarket, OrphanPositionError
 from agents.observer import MagnusObserver
-from agents.application.scanner import MarketScanner
+from agents.application.scanner import MarketScanner, CandidateQueue, PRICE_MARKET_RE
+
+# Network fetches for manage_active_trades (books / price history per position) – I/O bound, run in parallel.
+try:
+    _MANAGE_WORKERS = max(1, int(os.getenv("MAGNUS_MANAGE_FETCH_WORKERS", "16")))
+except ValueError:
+    _MANAGE_WORKERS = 16
+_MANAGE_POOL = ThreadPoolExecutor(max_workers=_MANAGE_WORKERS, thread_name_prefix="magnus-manage")
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_end_dt(end_date_str: str):
+    """Parse Gamma endDate to an aware datetime (None if unparseable). Cached: the same dates repeat every round."""
+    end_str = (end_date_str or "").strip()
+    if not end_str:
+        return None
+    try:
+        end_dt = dt.datetime.fromisoformat(end_str.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    # Naive = UTC (Gamma dates without offset)
+    if end_dt.tzinfo is None:
+        end_dt = end_dt.replace(tzinfo=dt.timezone.utc)
+    return end_dt
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_db_ts(ts_str: str):
+    """Parse a trades.timestamp value (SQLite CURRENT_TIMESTAMP, UTC) to an aware datetime, or None."""
+    try:
+        return dt.datetime.strptime(ts_str.split(".", 1)[0], "%Y-%m-%d %H:%M:%S").replace(tzinfo=dt.timezone.utc)
+    except ValueError:
+        return None
+
+
+def _num(d: dict, key: str, default: float = 0.0) -> float:
+    """float(d[key]) with default for missing/None/""/0 – DB rows and API dicts mix None and strings."""
+    v = d.get(key)
+    return float(v) if v else default
+
+
+# Optional similar-analyses context (scripts/python/build_trades_chroma.py) – imported lazily, once.
+try:
+    _SIMILAR_TTL = max(1.0, float(os.getenv("MAGNUS_SIMILAR_ANALYSES_TTL_SECONDS", "600")))
+except ValueError:
+    _SIMILAR_TTL = 600.0
+
+
+@functools.lru_cache(maxsize=1)
+def _load_bcc():
+    """build_trades_chroma module, or None if it can't be imported (first call only; result cached)."""
+    scripts_dir = str(root_path / "scripts" / "python")
+    if scripts_dir not in sys.path:
+        sys.path.insert(0, scripts_dir)
+    try:
+        import build_trades_chroma
+        return build_trades_chroma
+    except Exception:
+        return None
+
+
+@functools.lru_cache(maxsize=512)
+def _similar_analyses_cached(full_title: str, k: int, bucket: int):
+    bcc = _load_bcc()
+    if bcc is None:
+        return None
+    return bcc.get_similar_analyses_context(full_title, k=k)
+
+
+def _similar_analyses(full_title: str, k: int = 3):
+    """Similar past analyses for a title (None if build_trades_chroma is unavailable).
+    Cached per MAGNUS_SIMILAR_ANALYSES_TTL_SECONDS window so new trades in the store show up."""
+    return _similar_analyses_cached(full_title, k, int(time.monotonic() // _SIMILAR_TTL))
+
+
+def _compile_title_patterns(patterns):
+    """Compile (term, term2 | None) title patterns: one regex for single terms, one prefilter over all pair terms."""
+    singles = [p1 for p1, p2 in patterns if p2 is None]
+    pairs = [(p1, p2) for p1, p2 in patterns if p2 is not None]
+    single_re = re.compile("|".join(map(re.escape, singles))) if singles else None
+    pair_terms = {t for pair in pairs for t in pair}
+    pair_re = re.compile("|".join(map(re.escape, sorted(pair_terms, key=len, reverse=True)))) if pair_terms else None
+    return single_re, pair_re, pairs
+
+
+def _title_matches(t_lower: str, compiled) -> bool:
+    """True if lowercase title matches any compiled pattern (pairs = both terms present)."""
+    single_re, pair_re, pairs = compiled
+    if single_re is not None and single_re.search(t_lower):
+        return True
+    # Most titles contain no pair term at all – only then check the conjunctions.
+    if pair_re is not None and pair_re.search(t_lower):
+        return any(p1 in t_lower and p2 in t_lower for p1, p2 in pairs)
+    return False
 
 
 class StopLossMonitor(threading.Thread):
     """
     Dedicated thread that runs manage_active_trades every N seconds – independent of War Room.
     Ensures stop-loss triggers even during long analyses (2–5 min per batch).
+    Also refreshes balance + drawdown state so the consumer loop never waits on it.
     """
     def __init__(self, trade_manager, interval_seconds: int = 30, daemon: bool = True):
         super().__init__(daemon=daemon)
@@ -47,21 +144,27 @@ class StopLossMonitor(threading.Thread):
         self._stop.set()
 
     def run(self):
+        # First pass immediately at startup, then every interval
         while not self._stop.is_set():
-            if self._stop.wait(timeout=self.interval):
-                break
             try:
                 self.trade_manager.manage_active_trades()
             except Exception as e:
                 logger.warning("StopLossMonitor: %s", str(e)[:100])
+            try:
+                self.trade_manager._refresh_account_state()
+            except Exception as e:
+                logger.warning("StopLossMonitor balance: %s", str(e)[:100])
+            if self._stop.wait(timeout=self.interval):
+                break
 
 
-from agents.logging_config import setup_logging
+from agents.logging_config import setup_logging, LIVE_LOGGER_NAME
 from agents.portfolio_risk import PortfolioRiskManager
 from agents.dynamic_target import compute_dynamic_target
 
 import logging
 logger = logging.getLogger("magnus.trade")
+live_logger = logging.getLogger(LIVE_LOGGER_NAME)
 setup_logging()
 
 # Pending GTC buys that did not fill within 36s – saved for orphan-fill recovery
@@ -76,11 +179,31 @@ class Trade:
         self.polymarket = Polymarket()
         self.portfolio_risk = PortfolioRiskManager(self.db, self.polymarket)
         self._manage_trades_lock = threading.Lock()
+        # Open-positions snapshot shared by scanner gates, event checks and run_batch (several threads).
+        # Invalidated on our own DB writes; the TTL picks up external changes (CLI delete-trade etc).
+        self._open_positions_lock = threading.Lock()
+        self._open_positions_cache = None  # (positions, market_ids, event_counts, expires_at)
+        self._open_positions_gen = 0
+        try:
+            self._open_positions_ttl = float(os.getenv("MAGNUS_OPEN_POSITIONS_TTL_SECONDS", "30"))
+        except ValueError:
+            self._open_positions_ttl = 30.0
+        # History stats memo: key changes when a new tick arrives, so no TTL needed (scanner + manage threads).
+        self._stats_cache = OrderedDict()
+        self._stats_cache_lock = threading.Lock()
+        self._stats_cache_max = 1024
         
         # Core: buy cheap, sell high. Only buy when price < our value.
         self.profit_target = 0.07       # Baseline 7%; raised to 10% for cheap buys
         self.profit_target_high = 0.10  # Used when fill < price_high_threshold
         self.price_high_threshold = 0.30  # If fill < 0.30 use profit_target_high (larger upside)
+        # Target thresholds are fixed for the run – bind them once
+        self._target_fn = functools.partial(
+            compute_dynamic_target,
+            base_target_pct=self.profit_target,
+            high_target_pct=self.profit_target_high,
+            price_high_threshold=self.price_high_threshold,
+        )
         try:
             self.min_edge_to_enter = float(os.getenv("MAGNUS_MIN_EDGE", "0.025"))
         except ValueError:
@@ -130,6 +253,7 @@ class Trade:
             ("viral", "challenge"), ("elon", "tweet"), ("sbf", None), ("ftx", None),
         ]
         self.skip_manipulation_suspect = os.getenv("MAGNUS_SKIP_MANIPULATION_SUSPECT", "1").strip().lower() in ("1", "true", "yes")
+        self._manipulation_title_matcher = _compile_title_patterns(self.manipulation_title_patterns)
         # 0 = buy even if price not below average (recommended so Quant-BUY actually becomes buy)
         self.require_below_avg = os.getenv("MAGNUS_REQUIRE_BELOW_AVG", "0").strip().lower() not in ("0", "false", "no")
         self.allow_at_avg_if_hype_min = 6   # If hype_score >= this, allow buy at "near avg" too (0 = off)
@@ -140,11 +264,12 @@ class Trade:
         self.min_change_1h_pct = 0  # Skip if |1h change| < this % (0 = off)
         self.active_observer = None
         # Balanced events (sport): max 1 buy per event; others (ETH levels): multiple allowed
-        self.balanced_event_categories = ("Sports", "Crypto", "Earnings")
+        # Category sets are frozensets: membership is checked per token/candidate in scanner and run_batch.
+        self.balanced_event_categories = frozenset(("Sports", "Crypto", "Earnings"))
         self.max_positions_per_event = 2
-        self.high_risk_categories = ("Crypto", "Business", "Tech", "Economics", "Geopolitics")
+        self.high_risk_categories = frozenset(("Crypto", "Business", "Tech", "Economics", "Geopolitics"))
         # All categories in scope – no category prioritisation; edge decides.
-        self.preferred_categories = ()
+        self.preferred_categories = frozenset()
         # Min bid liquidity for buy allowed (low = more into analysis; Quant can reject illiquid)
         try:
             self.min_bid_liquidity_usdc = float(os.getenv("MAGNUS_MIN_BID_LIQUIDITY", "3.0"))
@@ -183,6 +308,25 @@ class Trade:
             self.max_open_positions = 10
             self.stop_loss_pct = 0.15
 
+        # Buy policy by high-risk flag: (ai_max_price cap, Kelly fraction, entry price cap). Fixed after init.
+        # Must be room for profit incl. fees. MAGNUS_MAX_BUY_PRICE (default 0.6) = max 40¢/share.
+        try:
+            max_buy = float(os.getenv("MAGNUS_MAX_BUY_PRICE", "0.6"))
+        except ValueError:
+            max_buy = 0.6
+        max_buy = max(0.01, min(0.99, max_buy))
+        self._buy_policy = {
+            True: (min(max_buy, 0.75), 0.10 if self.uncertain_market else 0.20, min(self.max_entry_price, 0.85)),
+            False: (max_buy, 0.30 if self.uncertain_market else 0.45, self.max_entry_price),
+        }
+        # All categories: same buy willingness when edge exists (previous "preferred" logic for all).
+        self._hype_threshold = max(self.allow_at_avg_if_hype_min - 3, 1)
+        # Max concurrent War Room evaluations within a batch
+        try:
+            self.war_room_concurrency = max(1, int(os.getenv("MAGNUS_WAR_ROOM_CONCURRENCY", "4")))
+        except ValueError:
+            self.war_room_concurrency = 4
+
         # Exit shadow mode: recovery heuristics (logging only, no order impact)
         self.exit_shadow_mode = os.getenv("MAGNUS_EXIT_SHADOW_MODE", "1").strip().lower() in ("1", "true", "yes")
         try:
@@ -202,35 +346,47 @@ class Trade:
         except ValueError:
             self.recovery_low_max_range_pct = 10.0
 
-    def _log_to_live(self, msg):
-        try:
-            with open("magnus_live.log", "a", encoding="utf-8") as f:
-                f.write(f"[{dt.datetime.now().strftime('%H:%M:%S')}] {msg}\n")
-                f.flush()
-        except Exception:
-            pass
+        # (balance, should_pause, drawdown_pct) – refreshed by StopLossMonitor, read by the consumer loop
+        self._account_state = None
+        self._account_lock = threading.Lock()
 
-    def _price_and_time_context(self, current_price: float, stats: dict, end_date_str: str):
+    def _log_to_live(self, msg):
+        # magnus_live.log via the logging queue (see logging_config) – the file write happens on the listener thread.
+        live_logger.info(msg)
+
+    def _refresh_account_state(self) -> tuple:
+        """Fetch USDC balance, log it and run the drawdown check. Returns (balance, should_pause, drawdown_pct)."""
+        balance = self.polymarket.get_usdc_balance()
+        with self._account_lock:
+            self.portfolio_risk.log_balance(balance)
+            should_pause, drawdown = self.portfolio_risk.check_drawdown(balance)
+            self._account_state = (balance, should_pause, drawdown)
+            return self._account_state
+
+    def _get_account_state(self) -> tuple:
+        """Last account state from the monitor thread; fetched here only before the first refresh."""
+        with self._account_lock:
+            state = self._account_state
+        return state if state is not None else self._refresh_account_state()
+
+    def _days_until_end(self, end_date_str: str, now_utc: dt.datetime | None = None):
+        """Days left to end date (1 decimal, >= 0), or None if the date is missing/unparseable."""
+        end_dt = _parse_end_dt(end_date_str or "")
+        if end_dt is None:
+            return None
+        delta = end_dt - (now_utc or dt.datetime.now(dt.timezone.utc))
+        return max(0, round(delta.total_seconds() / 86400, 1))
+
+    def _price_and_time_context(self, current_price: float, stats: dict, end_date_str: str, now_utc: dt.datetime | None = None):
         """Compute time to end and price context (vs avg, range, historical low)."""
-        days_until_end = None
-        try:
-            end_str = (end_date_str or "").replace("Z", "+00:00")
-            if "+" in end_str or end_str.endswith("00:00"):
-                end_dt = dt.datetime.fromisoformat(end_str)
-            else:
-                end_dt = dt.datetime.fromisoformat(end_str + "+00:00")
-            now = dt.datetime.now(dt.timezone.utc)
-            if end_dt.tzinfo is None:
-                end_dt = end_dt.replace(tzinfo=dt.timezone.utc)
-            delta = end_dt - now
-            days_until_end = max(0, round(delta.total_seconds() / 86400, 1))
-        except Exception:
-            pass
-
-        high = float(stats.get("high") or 0)
-        low = float(stats.get("low") or 0)
-        avg = float(stats.get("avg") or 0)
-        change_1h = float(stats.get("change_1h") or 0)
+        return self._days_until_end(end_date_str, now_utc), self._price_context(current_price, stats)
+
+    def _price_context(self, current_price: float, stats: dict) -> dict:
+        """Price context from history stats (vs avg, range, historical low/high)."""
+        high = _num(stats, "high")
+        low = _num(stats, "low")
+        avg = _num(stats, "avg")
+        change_1h = _num(stats, "change_1h")
         p = current_price
 
         price_vs_avg = "unknown"
@@ -259,16 +415,16 @@ class Trade:
             "avg": avg,
             "change_1h": change_1h,
         }
-        return days_until_end, price_context
+        return price_context
 
-    def _compute_recovery_potential(self, buy_price: float, current_price: float, stats: dict, end_date_str: str):
+    def _compute_recovery_potential(self, buy_price: float, current_price: float, stats: dict, end_date_str: str, now_utc: dt.datetime | None = None):
         """Heuristic: chance price can bounce given volatility and time left. Shadow mode only (logging)."""
         try:
-            days_until_end, price_context = self._price_and_time_context(current_price, stats or {}, end_date_str or "")
+            days_until_end, price_context = self._price_and_time_context(current_price, stats or {}, end_date_str or "", now_utc)
         except Exception:
             days_until_end, price_context = None, stats or {}
 
-        range_pct = float(price_context.get("range_pct") or 0)
+        range_pct = _num(price_context, "range_pct")
         in_lower_half = bool(price_context.get("in_lower_half"))
         near_low = bool(price_context.get("near_historical_low"))
 
@@ -337,7 +493,7 @@ class Trade:
         pending = self._load_pending_gtc()
         if not pending:
             return
-        open_token_ids = {str(t["token_id"]) for t in self.db.get_open_positions()}
+        open_token_ids = {str(t["token_id"]) for t in self._get_open_positions_cached()}
         now = time.time()
         recovered = 0
         for t_id, bal in positions_map.items():
@@ -351,23 +507,20 @@ class Trade:
                 continue
             try:
                 buy_price = float(p.get("limit_price") or p.get("amount_usdc", 0) / max(1, bal))
-                target_price = compute_dynamic_target(
+                target_price = self._target_fn(
                     fill_price=buy_price,
                     days_until_end=p.get("days_until_end"),
-                    range_pct=float(p.get("range_pct") or 0),
+                    range_pct=_num(p, "range_pct"),
                     hype_score=int(p.get("hype_score") or 0),
                     spread_pct=p.get("spread_pct"),
-                    ai_max_price=float(p.get("ai_max_price") or 0.99),
-                    base_target_pct=self.profit_target,
-                    high_target_pct=self.profit_target_high,
-                    price_high_threshold=self.price_high_threshold,
+                    ai_max_price=_num(p, "ai_max_price", 0.99),
                 )
                 self.db.log_new_trade(
                     token_id=t_id,
                     market_id=p.get("market_id", ""),
                     question=p.get("question", "Orphan fill"),
                     buy_price=buy_price,
-                    amount_usdc=float(p.get("amount_usdc") or 0),
+                    amount_usdc=_num(p, "amount_usdc"),
                     shares_bought=float(bal),
                     notes="Orphan fill (GTC filled after poll)",
                     category=p.get("category", ""),
@@ -376,6 +529,7 @@ class Trade:
                     end_date_iso=p.get("end_date_iso") or "",
                     event_id=p.get("event_id"),
                 )
+                self._invalidate_open_positions_cache()
                 ok = self.polymarket.execute_sell_order(t_id, bal, target_price)
                 if ok:
                     print(f"\n📥 Orphan fill recovered: {p.get('question', t_id)[:35]}… @ {buy_price:.2f} → GTC sell {target_price:.2f}")
@@ -404,7 +558,8 @@ class Trade:
             positions_map = self.polymarket.get_all_token_balances()
             self._recover_orphan_fills(positions_map)
 
-            trades = self.db.get_open_positions()
+            # Fresh read each cycle; also refreshes the shared open-positions snapshot.
+            trades = self._refresh_open_positions_cache()[0]
             if self.active_observer:
                 self.active_observer.sync_from_db()
             if not trades:
@@ -424,11 +579,18 @@ class Trade:
                     )
                     if aid:
                         orders_by_token.setdefault(aid, []).append(o)
+            # Prefetch books (and history for shadow mode) for all live positions in parallel; the loop below only does decisions + DB writes.
+            live_ids = [str(t['token_id']) for t in trades if positions_map.get(str(t['token_id']), 0.0) >= 5.0]
+            books = dict(zip(live_ids, _MANAGE_POOL.map(self._safe_get_book, live_ids)))
+            histories = {}
+            if self.exit_shadow_mode:
+                histories = dict(zip(live_ids, _MANAGE_POOL.map(self._safe_get_price_history, live_ids)))
+            now_utc = dt.datetime.now(dt.timezone.utc)
             for i, t in enumerate(trades):
                 t_id = t['token_id']
 
                 actual_balance = positions_map.get(str(t_id), 0.0)
-                target_price = float(t.get('target_price') or 0)
+                target_price = _num(t, "target_price")
                 # Missing GTC sell: if we have shares but no sell order, add one
                 if actual_balance >= 5.0 and target_price >= 0.01:
                     try:
@@ -450,6 +612,7 @@ class Trade:
                             except Exception as orphan_err:
                                 if isinstance(orphan_err, OrphanPositionError):
                                     self.db.update_trade_status(t_id, "CLOSED_ORPHAN", "Sell failed: not enough balance (orphan)")
+                                    self._invalidate_open_positions_cache()
                                     if self.active_observer:
                                         self.active_observer.remove_token(t_id)
                                     print(f"\n   🧹 Orphan: {t['question'][:30]} – closed (missing balance on CLOB)")
@@ -458,36 +621,39 @@ class Trade:
                     except Exception as e:
                         logger.warning("Missing GTC sell check failed for %s: %s", t_id, str(e)[:80])
                 if actual_balance < 0.01:
-                    buy_price = float(t.get('buy_price') or 0)
-                    target_price = float(t.get('target_price') or 0)
+                    buy_price = _num(t, "buy_price")
+                    target_price = _num(t, "target_price")
                     status = "CLOSED_PROFIT" if target_price >= buy_price * 1.01 else "CLOSED_LOSS"
                     self.db.update_trade_status(t_id, status, "Balance zero (sold via GTC)")
+                    self._invalidate_open_positions_cache()
                     if self.active_observer:
                         self.active_observer.remove_token(t_id)
                     icon = "✅" if status == "CLOSED_PROFIT" else "❌"
                     print(f"\n{icon} Closed trade ({status}): {t['question'][:30]}")
                     continue
+                if actual_balance < 5.0:
+                    # Dust (below CLOB min size): nothing to sell or price – only clear a stale selling flag
+                    if t.get('selling_in_progress') == 1 and t.get('order_active_in_book') == 0:
+                        self.db.set_selling_flags(t_id, False, False)
+                        self._invalidate_open_positions_cache()
+                    continue
 
                 # Trade age for arming delay
                 trade_age_hours = None
-                ts_str = (t.get("timestamp") or "").strip()
-                if ts_str:
-                    try:
-                        opened = dt.datetime.strptime(ts_str.split(".", 1)[0], "%Y-%m-%d %H:%M:%S").replace(tzinfo=dt.timezone.utc)
-                        trade_age_hours = max(0.0, (dt.datetime.now(dt.timezone.utc) - opened).total_seconds() / 3600.0)
-                    except Exception:
-                        trade_age_hours = None
+                opened = _parse_db_ts((t.get("timestamp") or "").strip())
+                if opened is not None:
+                    trade_age_hours = max(0.0, (now_utc - opened).total_seconds() / 3600.0)
 
                 # Sell price (bid) / buy price (ask) – stop-loss uses bid
-                buy_price = float(t.get('buy_price') or 0)
-                bid, ask, _bid_liq = self.polymarket.get_book(t_id) if actual_balance >= 5.0 else (None, None, 0.0)
+                buy_price = _num(t, "buy_price")
+                bid, ask, _bid_liq = books.get(str(t_id), (None, None, 0.0))
                 current_bid = float(bid) if bid is not None else None
-                current_ask = float(ask) if ask is not None else (self.polymarket.get_buy_price(t_id) if actual_balance >= 5.0 else 0)
+                current_ask = float(ask) if ask is not None else self.polymarket.get_buy_price(t_id)
                 price_for_sell_check = current_bid if current_bid is not None and current_bid > 0 else (current_ask if isinstance(current_ask, (int, float)) and current_ask > 0 else None)
 
                 # Stop-loss: if bid < buy - stop_loss_pct, sell at bid (not threshold) to get filled
                 young_trade = trade_age_hours is not None and trade_age_hours < self.min_hold_hours_before_sl
-                if self.stop_loss_pct > 0 and buy_price > 0 and actual_balance >= 5.0 and price_for_sell_check is not None and not young_trade:
+                if self.stop_loss_pct > 0 and buy_price > 0 and price_for_sell_check is not None and not young_trade:
                     try:
                         threshold = buy_price * (1 - self.stop_loss_pct)
                         if price_for_sell_check < threshold:
@@ -498,6 +664,7 @@ class Trade:
                                 ok = self.polymarket.execute_sell_order(t_id, actual_balance, stop_price)
                                 if ok:
                                     self.db.update_trade_status(t_id, "CLOSED_LOSS", f"Stop-loss at {stop_price:.3f}")
+                                    self._invalidate_open_positions_cache()
                     except Exception:
                         pass
 
@@ -508,20 +675,23 @@ class Trade:
                 _ask = current_ask if isinstance(current_ask, (int, float)) else 0
 
                 # Shadow mode: simulate smarter exit (no actual orders)
-                if self.exit_shadow_mode and buy_price > 0 and actual_balance >= 5.0:
+                if self.exit_shadow_mode and buy_price > 0:
                     try:
                         # Use same price as stop-loss check (bid or ask)
                         shadow_price = price_for_sell_check if isinstance(price_for_sell_check, (int, float)) and price_for_sell_check > 0 else _ask
                         if not shadow_price or shadow_price <= 0:
                             continue
 
-                        history = self.polymarket.get_price_history(t_id)
-                        stats = self.war_room._process_history(history)
+                        history = histories.get(str(t_id))
+                        if history is None:
+                            history = self.polymarket.get_price_history(t_id)
+                        stats = self._history_stats(t_id, history)
                         potential, meta = self._compute_recovery_potential(
                             buy_price=buy_price,
                             current_price=shadow_price,
                             stats=stats,
                             end_date_str=end_date_iso,
+                            now_utc=now_utc,
                         )
                         days_left = meta.get("days_until_end")
                         range_pct = meta.get("range_pct")
@@ -532,27 +702,80 @@ class Trade:
 
                 if t.get('selling_in_progress') == 1 and t.get('order_active_in_book') == 0:
                     self.db.set_selling_flags(t_id, False, False)
+                    self._invalidate_open_positions_cache()
             print()
         except Exception as e:
             print(f"\n⚠️ Trade management error: {(str(e)[:100])}")
 
-    def already_owns(self, market_id: str) -> bool:
+    def _history_stats(self, token_id: str, history: list) -> dict:
+        """war_room._process_history, memoized on (token, length, last tick)."""
+        if not history:
+            return self.war_room._process_history(history)
+        last = history[-1]
+        key = (str(token_id), len(history), last.get("t"), last.get("p"))
+        with self._stats_cache_lock:
+            stats = self._stats_cache.get(key)
+            if stats is not None:
+                self._stats_cache.move_to_end(key)
+                return stats
+        stats = self.war_room._process_history(history)
+        with self._stats_cache_lock:
+            self._stats_cache[key] = stats
+            while len(self._stats_cache) > self._stats_cache_max:
+                self._stats_cache.popitem(last=False)
+        return stats
+
+    def _safe_get_book(self, token_id: str) -> tuple:
+        try:
+            return self.polymarket.get_book(token_id)
+        except Exception:
+            return (None, None, 0.0)
+
+    def _safe_get_price_history(self, token_id: str):
+        try:
+            return self.polymarket.get_price_history(token_id)
+        except Exception:
+            return None
+
+    def _refresh_open_positions_cache(self) -> tuple:
+        """Read open positions from DB and rebuild the snapshot (positions, market-id set, event Counter)."""
+        with self._open_positions_lock:
+            gen = self._open_positions_gen
         trades = self.db.get_open_positions()
-        return any(str(t['market_id']) == str(market_id) for t in trades)
+        event_counts = Counter(str(t.get("event_id") or "").strip() for t in trades)
+        event_counts.pop("", None)
+        snap = (trades, {str(t.get("market_id")) for t in trades}, event_counts, time.monotonic() + self._open_positions_ttl)
+        with self._open_positions_lock:
+            # Skip storing if a write invalidated the cache while we were reading.
+            if gen == self._open_positions_gen:
+                self._open_positions_cache = snap
+        return snap
+
+    def _open_positions_snapshot(self) -> tuple:
+        with self._open_positions_lock:
+            snap = self._open_positions_cache
+        if snap is not None and time.monotonic() < snap[3]:
+            return snap
+        return self._refresh_open_positions_cache()
+
+    def _get_open_positions_cached(self) -> list:
+        """Open positions, served from the snapshot (refreshed after our own writes or TTL)."""
+        return self._open_positions_snapshot()[0]
+
+    def _invalidate_open_positions_cache(self) -> None:
+        """Call after any write that changes open positions (buy, close, flags)."""
+        with self._open_positions_lock:
+            self._open_positions_gen += 1
+            self._open_positions_cache = None
+
+    def already_owns(self, market_id: str) -> bool:
+        return str(market_id) in self._open_positions_snapshot()[1]
 
     def _is_manipulation_suspect(self, title: str) -> bool:
         """True if title matches manipulation-suspect patterns (pump/dump, viral challenge, etc)."""
         if not self.skip_manipulation_suspect or not title:
             return False
-        t = title.lower()
-        for p1, p2 in getattr(self, "manipulation_title_patterns", []):
-            if p2 is None:
-                if p1 in t:
-                    return True
-            else:
-                if p1 in t and p2 in t:
-                    return True
-        return False
+        return _title_matches(title.lower(), self._manipulation_title_matcher)
 
     def _allow_market_scan(self, market_id: str) -> bool:
         """True if market should enter scanner. Only blocks if we have open position (already_owns).
@@ -564,15 +787,13 @@ class Trade:
         """True if we already have open position in this event."""
         if not event_id or not str(event_id).strip():
             return False
-        trades = self.db.get_open_positions()
-        return any(str(t.get("event_id") or "").strip() == str(event_id).strip() for t in trades)
+        return self._open_positions_snapshot()[2][str(event_id).strip()] > 0
 
     def count_open_positions_in_event(self, event_id: str) -> int:
         """Count of open positions in this event."""
         if not event_id or not str(event_id).strip():
             return 0
-        trades = self.db.get_open_positions()
-        return sum(1 for t in trades if str(t.get("event_id") or "").strip() == str(event_id).strip())
+        return self._open_positions_snapshot()[2][str(event_id).strip()]
 
     def _allow_more_positions_in_event(self, event_id: str, category: str) -> bool:
         """False if we have enough positions in this event (balanced=max 1, others=max N)."""
@@ -597,7 +818,7 @@ class Trade:
         new_key = _key(question)
         if len(new_key) < 12 or " vs" not in new_key:
             return False
-        for t in self.db.get_open_positions():
+        for t in self._get_open_positions_cached():
             existing = _key(t.get("question") or "")
             if existing and new_key[:20] == existing[:20]:
                 return True
@@ -623,6 +844,16 @@ class Trade:
             _loop = asyncio.new_event_loop()
             asyncio.set_event_loop(_loop)
 
+        def _close_loop_client():
+            # War Room pools one AsyncClient per loop – close the consumer loop's on exit.
+            if not _loop.is_closed() and not _loop.is_running():
+                try:
+                    _loop.run_until_complete(self.war_room.aclose_client())
+                except Exception:
+                    pass
+
+        atexit.register(_close_loop_client)
+
         # 1. Start real-time monitoring
         open_trades = self.db.get_open_positions()
         token_ids = [str(t["token_id"]) for t in open_trades if t.get("token_id")]
@@ -642,7 +873,7 @@ class Trade:
         print(f"🛑 Stop-loss monitor started (interval {sl_interval}s).")
 
         # 2. Scanner queue (Bouncer in scanner – only PASS in queue)
-        candidate_queue = queue.Queue(maxsize=500)
+        candidate_queue = CandidateQueue(maxsize=500)
         # Scan cadence and dedup TTL can be tuned via env
         try:
             scan_interval = int(os.getenv("MAGNUS_SCAN_INTERVAL_SECONDS", "900"))  # default: 15 min – more scanner rounds, more candidates
@@ -669,22 +900,20 @@ class Trade:
         scanner.start()
         print("📡 Scanner thread started (Bouncer in scanner).")
 
+        # Consumer error backoff: 1s, doubling up to 30s while errors keep coming; a quiet minute resets it
+        error_backoff = 0.0
+        last_error_at = 0.0
         while True:
             try:
-                balance = self.polymarket.get_usdc_balance()
-                self.portfolio_risk.log_balance(balance)
-
-                should_pause, drawdown = self.portfolio_risk.check_drawdown(balance)
+                # Balance/drawdown and manage_active_trades run on the stop-loss monitor thread
+                balance, should_pause, drawdown = self._get_account_state()
                 if should_pause:
                     print(f"\n💵 Balance: {balance:.2f} USDC")
                     print(f"🛑 Portfolio drawdown {drawdown}% exceeds limit. Pausing new trades for 5 min...")
                     self._log_to_live(f"🛑 Drawdown {drawdown}% — pausing new trades")
-                    self.manage_active_trades()
                     time.sleep(300)
                     continue
-                
-                self.manage_active_trades()
-                
+
                 if balance < 2.0:
                     print(f"\n💵 Balance: {balance:.2f} USDC")
                     print(f"💤 Balance < 2.0 USDC. Waiting 2 min...")
@@ -694,10 +923,12 @@ class Trade:
                     """Run War Room for batch; returns (new_balance, skip_rest). skip_bouncer=True for scanner candidates."""
                     skip_rest = False
                     # Filtrera bort manipulation-suspekta innan War Room (sparar AI-tokens)
-                    batch_list = [c for c in batch_list if not self._is_manipulation_suspect(c.get("full_title") or "")]
+                    batch_list = [c for c in batch_list if not self._is_manipulation_suspect(c.full_title or "")]
                     if not batch_list:
                         return (balance, skip_rest)
-                    payloads = [c["market_for_ai"] for c in batch_list]
+                    payloads = [c.market_for_ai for c in batch_list]
+                    # Analyses are handed to the DB writer thread in one go when the batch is done
+                    analysis_rows = []
                     def _process_one(c, raw, bal, skip):
                         """Process one War Room result; returns (new_balance, new_skip_rest)."""
                         # Normalise decision so we always have consistent structure (no silent default-risk).
@@ -709,16 +940,16 @@ class Trade:
                         decision["reason"] = (str(decision.get("reason") or ""))[:500]
                         decision["hype_score"] = int(decision.get("hype_score") or 0)
 
-                        full_title = c["full_title"]
-                        e_category = c["e_category"]
-                        current_price = c["current_price"]
-                        price_context = c["price_context"]
-                        token_id = c["token_id"]
-                        m_id = c["m_id"]
-                        market_data = c["market_data"]
-                        spread_pct = c["spread_pct"]
-                        bid, ask = c["bid"], c["ask"]
-                        end_date_str = c["end_date_str"]
+                        full_title = c.full_title
+                        e_category = c.e_category
+                        current_price = c.current_price
+                        price_context = c.price_context
+                        token_id = c.token_id
+                        m_id = c.m_id
+                        condition_id = c.condition_id
+                        spread_pct = c.spread_pct
+                        bid, ask = c.bid, c.ask
+                        end_date_str = c.end_date_str
 
                         # Fallback heuristic: if Quant is overly cautious but we see clear edge
                         # (high hype, price in lower part of range, sufficient volatility and time left),
@@ -727,9 +958,9 @@ class Trade:
                         if decision["action"] == "REJECT":
                             hype = decision["hype_score"]
                             pc = price_context or {}
-                            days_until_end = c.get("market_for_ai", {}).get("days_until_end")
+                            days_until_end = c.days_until_end
                             spread_here = spread_pct
-                            range_pct = float(pc.get("range_pct") or 0.0)
+                            range_pct = _num(pc, "range_pct")
                             in_lower_half = bool(pc.get("in_lower_half"))
                             near_low = bool(pc.get("near_historical_low"))
                             # Ease: hype 6+, range 3%+, 0.5+ days left – more REJECT become BUY when edge exists.
@@ -753,40 +984,10 @@ class Trade:
                                 )
                                 # Keep original Quant reason for DB transparency, but log auto-heuristic separately.
                                 self._log_to_live(f"🤖 Fallback BUY override: {auto_reason[:180]}")
-                        # region agent log
-                        try:
-                            import json as _json  # local alias for debug logging
-                            with open("/home/kim/agents/.cursor/debug-ed1d60.log", "a", encoding="utf-8") as _fdbg:
-                                _fdbg.write(
-                                    _json.dumps(
-                                        {
-                                            "sessionId": "ed1d60",
-                                            "runId": "pre-fix",
-                                            "hypothesisId": "H2",
-                                            "location": "trade.py:run_batch",
-                                            "message": "war_room_decision",
-                                            "data": {
-                                                "question": (full_title or "")[:120],
-                                                "category": e_category,
-                                                "action": decision.get("action", "REJECT"),
-                                                "max_price": decision.get("max_price", 0),
-                                                "current_price": current_price,
-                                                "hype": int(decision.get("hype_score", 0)),
-                                            },
-                                            "timestamp": int(time.time() * 1000),
-                                        }
-                                    )
-                                    + "\n"
-                                )
-                        except Exception:
-                            pass
-                        # endregion
-                        self.db.log_analysis(
-                            question=full_title, category=e_category,
-                            action=decision.get("action", "REJECT"), reason=decision.get("reason", ""),
-                            max_price=decision.get("max_price", 0), current_price=current_price,
-                            hype_score=int(decision.get("hype_score", 0)),
-                        )
+                        analysis_rows.append((
+                            full_title, e_category, decision.get("action", "REJECT"), decision.get("reason", ""),
+                            decision["max_price"], current_price, decision["hype_score"],
+                        ))
                         title_short = (full_title or "")[:48]
                         if decision.get("action") == "REJECT":
                             reason = (decision.get("reason") or "").strip()[:70]
@@ -796,57 +997,8 @@ class Trade:
                             print(f"   → APPROVED: {title_short} | max {decision.get('max_price', 0):.2f}", flush=True)
                         if decision.get('action') == "BUY":
                             print(f"   🔍 Processing BUY: {title_short[:40]}... (max {decision.get('max_price', 0):.2f})", flush=True)
-                            # region agent log
-                            try:
-                                import json as _json  # local alias for debug logging
-                                with open("/home/kim/agents/.cursor/debug-ed1d60.log", "a", encoding="utf-8") as _fdbg:
-                                    _fdbg.write(
-                                        _json.dumps(
-                                            {
-                                                "sessionId": "ed1d60",
-                                                "runId": "pre-fix",
-                                                "hypothesisId": "H3",
-                                                "location": "trade.py:BUY_block",
-                                                "message": "buy_block_enter",
-                                                "data": {
-                                                    "question": (full_title or "")[:120],
-                                                    "category": e_category,
-                                                    "ai_max_price": decision.get("max_price", 0),
-                                                    "current_price": current_price,
-                                                },
-                                                "timestamp": int(time.time() * 1000),
-                                            }
-                                        )
-                                        + "\n"
-                                    )
-                            except Exception:
-                                pass
-                            # endregion
-                            # Balanced events (sport): max 1 buy; others (ETH levels): max N
-                            event_id = (c.get("event_id") or "").strip()
-                            if event_id and not self._allow_more_positions_in_event(event_id, e_category):
-                                n = self.count_open_positions_in_event(event_id)
-                                if (e_category or "").strip() in self.balanced_event_categories:
-                                    msg = "Already have position in this event (balanced, max 1). Skipping buy."
-                                    print(f"   ⏸️ {msg}")
-                                    self._log_to_live(f"⏸️ {msg}")
-                                else:
-                                    msg = f"Already {n} position(s) in this event (max {self.max_positions_per_event}). Skipping buy."
-                                    print(f"   ⏸️ {msg}")
-                                    self._log_to_live(f"⏸️ {msg}")
-                                return (bal, skip)
-                            # Sport: avoid multiple positions in same match even if event_id differs (MAGNUS_SPORTS_TITLE_DEDUP=1)
-                            if self.sports_title_dedup and self._has_similar_sports_position(full_title, e_category):
-                                msg = "Already have position in this match (Sports title dedup). Skipping buy."
-                                print(f"   ⏸️ {msg}")
-                                self._log_to_live(f"⏸️ {msg}")
-                                return (bal, skip)
-                            if self.portfolio_risk.check_correlation(full_title, e_category):
-                                msg = f"Too many correlated positions in {e_category}. Skipping buy."
-                                print(f"   ⏸️ {msg}")
-                                self._log_to_live(f"⏸️ {msg}")
-                                return (bal, skip)
-                            days_until_end = c.get("market_for_ai", {}).get("days_until_end")
+                            # Cheap numeric checks first; event/sports/correlation checks walk open positions.
+                            days_until_end = c.days_until_end
                             change_1h = price_context.get("change_1h")
                             # Avoid catching falling knives in high-risk categories
                             if (
@@ -862,25 +1014,21 @@ class Trade:
                                 self._log_to_live(f"⏸️ Too little time left (< {min_days} day). Skipping buy.")
                                 print(f"   ⏸️ Too little time left (< {min_days} day). Skipping buy.")
                                 return (bal, skip)
-                            open_count = len(self.db.get_open_positions())
+                            open_count = len(self._get_open_positions_cached())
                             if open_count >= self.max_open_positions:
                                 self._log_to_live(f"⏸️ Max open positions ({self.max_open_positions}). Skipping new buy.")
                                 print(f"   ⏸️ Max open positions ({self.max_open_positions}). Skipping new buy.")
                                 return (bal, skip)
+                            is_high_risk = e_category in self.high_risk_categories
+                            ai_cap, kelly_frac, price_cap = self._buy_policy[is_high_risk]
                             is_price_market = False
                             if self.require_below_avg:
                                 in_lower = price_context.get("in_lower_half")
                                 under_avg = price_context.get("price_vs_avg") == "below average"
-                                hype = int(decision.get("hype_score") or 0)
-                                # All categories: same buy willingness when edge exists (previous "preferred" logic for all).
-                                hype_threshold = max(self.allow_at_avg_if_hype_min - 3, 1)
-                                allow_exception = hype_threshold and hype >= hype_threshold
-                                full_title_lower = (full_title or "").lower()
-                                is_price_market = any(
-                                    kw in full_title_lower
-                                    for kw in ["price of", "above $", "below $", "finish week", "finish the week"]
-                                ) or "$" in (full_title or "")
-                                if is_price_market and e_category in self.high_risk_categories:
+                                hype = decision["hype_score"]
+                                allow_exception = hype >= self._hype_threshold
+                                is_price_market = PRICE_MARKET_RE.search(full_title or "") is not None
+                                if is_price_market and is_high_risk:
                                     if not in_lower:
                                         print(f"   ⏸️ Skipping buy (price-market, high risk): not in lower half of range.")
                                         return (bal, skip)
@@ -889,7 +1037,7 @@ class Trade:
                                     print(f"   ⏸️ {msg}")
                                     self._log_to_live(f"⏸️ {msg}")
                                     return (bal, skip)
-                            ai_max_price = float(decision.get('max_price', 0.0) or 0.0)
+                            ai_max_price = decision["max_price"]
                             # Block buy at top – we never buy high
                             near_high = bool(price_context.get("near_historical_high"))
                             if near_high:
@@ -897,21 +1045,35 @@ class Trade:
                                 print(f"   ⏸️ {msg}")
                                 self._log_to_live(f"⏸️ {msg}")
                                 return (bal, skip)
-                            # Must be room for profit incl. fees. MAGNUS_MAX_BUY_PRICE (default 0.6) = max 40¢/share.
-                            try:
-                                max_buy = float(os.getenv("MAGNUS_MAX_BUY_PRICE", "0.6"))
-                            except ValueError:
-                                max_buy = 0.6
-                            max_buy = max(0.01, min(0.99, max_buy))
-                            ai_cap = min(max_buy, 0.75) if e_category in self.high_risk_categories else max_buy
+                            # Balanced events (sport): max 1 buy; others (ETH levels): max N
+                            event_id = (c.event_id or "").strip()
+                            if event_id and not self._allow_more_positions_in_event(event_id, e_category):
+                                n = self.count_open_positions_in_event(event_id)
+                                if (e_category or "").strip() in self.balanced_event_categories:
+                                    msg = "Already have position in this event (balanced, max 1). Skipping buy."
+                                    print(f"   ⏸️ {msg}")
+                                    self._log_to_live(f"⏸️ {msg}")
+                                else:
+                                    msg = f"Already {n} position(s) in this event (max {self.max_positions_per_event}). Skipping buy."
+                                    print(f"   ⏸️ {msg}")
+                                    self._log_to_live(f"⏸️ {msg}")
+                                return (bal, skip)
+                            # Sport: avoid multiple positions in same match even if event_id differs (MAGNUS_SPORTS_TITLE_DEDUP=1)
+                            if self.sports_title_dedup and self._has_similar_sports_position(full_title, e_category):
+                                msg = "Already have position in this match (Sports title dedup). Skipping buy."
+                                print(f"   ⏸️ {msg}")
+                                self._log_to_live(f"⏸️ {msg}")
+                                return (bal, skip)
+                            if self.portfolio_risk.check_correlation(full_title, e_category, self._get_open_positions_cached()):
+                                msg = f"Too many correlated positions in {e_category}. Skipping buy."
+                                print(f"   ⏸️ {msg}")
+                                self._log_to_live(f"⏸️ {msg}")
+                                return (bal, skip)
+                            # Cap from MAGNUS_MAX_BUY_PRICE (lower for high-risk), see _buy_policy
                             ai_max_price = min(ai_max_price, ai_cap)
                             # Quant said BUY – only require we don't pay over their max (no extra edge gate)
                             if current_price <= ai_max_price:
                                 # Kelly: same for all non high-risk (all categories with edge); less for high-risk
-                                if e_category in self.high_risk_categories:
-                                    kelly_frac = 0.20 if not self.uncertain_market else 0.10
-                                else:
-                                    kelly_frac = 0.30 if self.uncertain_market else 0.45
                                 bet = self.risk.calculate_kelly_bet(ai_max_price, current_price, bal, kelly_fraction=kelly_frac)
                                 # Kelly can be very small – use at least X% of balance
                                 bet_floor = bal * getattr(self, "min_bet_pct_balance", 0.05)
@@ -927,10 +1089,7 @@ class Trade:
                                 if price_now > ai_max_price + price_tolerance:
                                     print(f"   ⚠️ Price moved during analysis: {current_price:.2f} → {price_now:.2f} (max {ai_max_price}). Skipping buy.")
                                     return (bal, skip)
-                                # Safety band: not over our global max; high-risk slightly lower
-                                price_cap = self.max_entry_price
-                                if e_category in self.high_risk_categories:
-                                    price_cap = min(price_cap, 0.85)
+                                # Safety band: not over our global max; high-risk slightly lower (price_cap from _buy_policy)
                                 min_p = getattr(self, "min_entry_price", 0.10)
                                 if price_now < min_p or price_now > price_cap:
                                     print(f"   ⚠️ Price out of band ({price_now:.2f} > {price_cap:.2f}). Skipping buy.")
@@ -966,63 +1125,10 @@ class Trade:
                                     self._log_to_live(f"⚠️ {msg}")
                                     return (bal, skip)
                                 print(f"\n💎 Approved for buy. Price now: {price_now:.2f}. Placing order ({bet:.2f} USDC, ≥5 shares).", flush=True)
-                                # region agent log
-                                try:
-                                    import json as _json  # local alias for debug logging
-                                    with open("/home/kim/agents/.cursor/debug-ed1d60.log", "a", encoding="utf-8") as _fdbg:
-                                        _fdbg.write(
-                                            _json.dumps(
-                                                {
-                                                    "sessionId": "ed1d60",
-                                                    "runId": "pre-fix",
-                                                    "hypothesisId": "H4",
-                                                    "location": "trade.py:execute_market_order",
-                                                    "message": "place_order",
-                                                    "data": {
-                                                        "question": (full_title or "")[:120],
-                                                        "category": e_category,
-                                                        "price_now": price_now,
-                                                        "ai_max_price": ai_max_price,
-                                                        "bet": bet,
-                                                        "balance": bal,
-                                                    },
-                                                    "timestamp": int(time.time() * 1000),
-                                                }
-                                            )
-                                            + "\n"
-                                        )
-                                except Exception:
-                                    pass
-                                # endregion
                                 market_to_buy = SimpleNamespace(
-                                    id=m_id, question=full_title, conditionId=market_data.get('conditionId'), active_token_id=token_id
+                                    id=m_id, question=full_title, conditionId=condition_id, active_token_id=token_id
                                 )
                                 order_id = self.polymarket.execute_market_order(market_to_buy, bet, max_price=ai_max_price)
-                                # region agent log
-                                try:
-                                    import json as _json  # local alias for debug logging
-                                    with open("/home/kim/agents/.cursor/debug-ed1d60.log", "a", encoding="utf-8") as _fdbg:
-                                        _fdbg.write(
-                                            _json.dumps(
-                                                {
-                                                    "sessionId": "ed1d60",
-                                                    "runId": "pre-fix",
-                                                    "hypothesisId": "H4",
-                                                    "location": "trade.py:execute_market_order",
-                                                    "message": "execute_market_order_return",
-                                                    "data": {
-                                                        "question": (full_title or "")[:120],
-                                                        "token_id": str(token_id),
-                                                        "order_id": str(order_id) if order_id else None,
-                                                    },
-                                                    "timestamp": int(time.time() * 1000),
-                                                }
-                                            )
-                                            + "\n"
-                                        )
-                                except Exception:
-                                    pass
-                                # endregion
                                 if order_id:
                                     # FOK fills immediately; maker BUY (GTC) rests on book – poll for fill
                                     time.sleep(2)
@@ -1035,19 +1141,16 @@ class Trade:
                                     actual_fill_price = round(bet / actual_shares, 3) if actual_shares and actual_shares > 0 else price_now
                                     if actual_shares and actual_shares >= 5.0:
                                         # Compute target immediately so user sees it (important for manual GTC sell with proxy)
-                                        _d_end = c.get("market_for_ai", {}).get("days_until_end")
+                                        _d_end = c.days_until_end
                                         _r_pct = price_context.get("range_pct", 0)
-                                        _hype = int(decision.get("hype_score") or 0)
-                                        _target = compute_dynamic_target(
+                                        _hype = decision["hype_score"]
+                                        _target = self._target_fn(
                                             fill_price=actual_fill_price,
                                             days_until_end=_d_end,
                                             range_pct=_r_pct,
                                             hype_score=_hype,
                                             spread_pct=spread_pct,
                                             ai_max_price=ai_max_price,
-                                            base_target_pct=self.profit_target,
-                                            high_target_pct=self.profit_target_high,
-                                            price_high_threshold=self.price_high_threshold,
                                         )
                                         print(f"✅ Buy complete! Receipt: #{order_id} | Fill: {actual_fill_price:.3f} (shares: {actual_shares:.2f}) | Target: {_target:.2f}")
                                     else:
@@ -1064,9 +1167,9 @@ class Trade:
                                             "event_id": event_id,
                                             "spread_pct": spread_pct,
                                             "ai_max_price": ai_max_price,
-                                            "days_until_end": c.get("market_for_ai", {}).get("days_until_end"),
+                                            "days_until_end": c.days_until_end,
                                             "range_pct": price_context.get("range_pct", 0),
-                                            "hype_score": int(decision.get("hype_score") or 0),
+                                            "hype_score": decision["hype_score"],
                                             "timestamp": int(time.time()),
                                         }
                                         self._save_pending_gtc(pending)
@@ -1079,6 +1182,7 @@ class Trade:
                                             category=e_category, spread_pct=spread_pct, target_price=target_price, end_date_iso=end_date_str,
                                             event_id=event_id or None,
                                         )
+                                        self._invalidate_open_positions_cache()
                                         print("💾 Order saved to DB.")
                                         sell_ok = self.polymarket.execute_sell_order(token_id, actual_shares, target_price)
                                         if not sell_ok:
@@ -1110,8 +1214,12 @@ class Trade:
                             raw = await self.war_room.evaluate_market(payloads[0], skip_bouncer=skip_bouncer)
                             bal, skip = _process_one(batch_list[0], raw, bal, skip)
                         else:
+                            # Cap in-flight War Room evaluations (LLM provider rate limits); results still stream as they finish
+                            sem = asyncio.Semaphore(self.war_room_concurrency)
+
                             async def _eval_with_idx(idx, m):
-                                raw = await self.war_room.evaluate_market(m, skip_bouncer=skip_bouncer)
+                                async with sem:
+                                    raw = await self.war_room.evaluate_market(m, skip_bouncer=skip_bouncer)
                                 return (idx, raw)
                             tasks = [_loop.create_task(_eval_with_idx(i, m)) for i, m in enumerate(payloads)]
                             task_to_idx = {t: i for i, t in enumerate(tasks)}
@@ -1139,10 +1247,13 @@ class Trade:
                     except Exception as war_err:
                         err_short = str(war_err)[:120]
                         print(f"\n⚠️ War Room error (batch): {err_short}")
-                        logger.exception("War Room batch error: %s", err_short)
+                        logger.warning("War Room batch error: %s", err_short)
+                        logger.debug("War Room batch error", exc_info=True)
                         self._log_to_live(f"⚠️ War Room batch error: {err_short}")
                         for c in batch_list:
                             balance, skip_rest = _process_one(c, {"action": "REJECT", "reason": f"Error: {war_err}", "max_price": 0.0, "hype_score": 0}, balance, skip_rest)
+                    finally:
+                        self.db.log_analyses_bulk(analysis_rows)
                     print("─" * 60, flush=True)
                     return (balance, skip_rest)
 
@@ -1152,13 +1263,8 @@ class Trade:
                 except ValueError:
                     WAR_ROOM_BATCH_SIZE = 4
                 WAR_ROOM_BATCH_SIZE = max(1, min(WAR_ROOM_BATCH_SIZE, 8))
-                batch_list = []
-                for _ in range(WAR_ROOM_BATCH_SIZE):
-                    try:
-                        c = candidate_queue.get(timeout=5)
-                        batch_list.append(c)
-                    except queue.Empty:
-                        break
+                # Wait for the first candidate, then take whatever is already queued (no 5s wait per extra slot)
+                batch_list = candidate_queue.get_batch(WAR_ROOM_BATCH_SIZE, timeout=5)
                 if not batch_list:
                     self._consumer_empty_count = getattr(self, "_consumer_empty_count", 0) + 1
                     qsize = candidate_queue.qsize()
@@ -1171,39 +1277,40 @@ class Trade:
                 qsize_after = candidate_queue.qsize()
                 print(f"\n💵 Balance: {balance:.2f} USDC")
                 self._log_to_live(f"💓 Heartbeat | Balance: {balance:.2f} USDC")
-                batch_list = [c for c in batch_list if c.get("market_for_ai") and c.get("full_title")]
+                batch_list = [c for c in batch_list if c.market_for_ai and c.full_title]
                 if not batch_list:
                     continue
                 # Cheapest first – we want to buy before price has time to move
-                batch_list.sort(key=lambda c: float(c.get("current_price") or 0.99))
+                batch_list.sort(key=lambda c: float(c.current_price or 0.99))
                 self._consumer_empty_count = 0
                 for c in batch_list:
                     try:
-                        import importlib, sys as _sys
-                        _bcc = _sys.modules.get("build_trades_chroma")
-                        if not _bcc:
-                            _bcc_path = str(Path(__file__).resolve().parents[2] / "scripts" / "python")
-                            if _bcc_path not in _sys.path:
-                                _sys.path.insert(0, _bcc_path)
-                            _bcc = importlib.import_module("build_trades_chroma")
-                        c["market_for_ai"]["similar_analyses"] = _bcc.get_similar_analyses_context(c["full_title"], k=3)
+                        similar = _similar_analyses(c.full_title, 3)
+                        if similar is not None:
+                            c.market_for_ai["similar_analyses"] = similar
                     except Exception:
                         pass
                 print("\n" + "═" * 60, flush=True)
                 print("🧠 WAR ROOM – picked " + str(len(batch_list)) + " from queue (" + str(qsize_after) + " remaining) – analysing:", flush=True)
                 print("═" * 60, flush=True)
                 for c in batch_list:
-                    title = str(c.get("full_title") or "")[:56]
-                    price = float(c.get("current_price") or 0)
+                    title = str(c.full_title or "")[:56]
+                    price = float(c.current_price or 0)
                     print("   • " + title + " @ " + f"{price:.2f}", flush=True)
                 try:
-                    balance, _ = run_batch(batch_list, balance, skip_bouncer=True)
+                    new_balance, _ = run_batch(batch_list, balance, skip_bouncer=True)
+                    if new_balance != balance:
+                        # Bought something – don't wait for the monitor to see the new balance
+                        self._refresh_account_state()
                 except Exception as batch_err:
                     print(f"\n⚠️ Consumer run_batch error: {batch_err}")
-                    logger.exception("Consumer run_batch error")
-                    traceback.print_exc()
+                    # Full traceback only at DEBUG – transient API errors repeat the same stack
+                    logger.warning("Consumer run_batch error: %s", str(batch_err)[:200])
+                    logger.debug("Consumer run_batch error", exc_info=True)
 
             except Exception:
                 logger.exception("Sniper loop exception")
-                traceback.print_exc()
-                time.sleep(30)
\ No newline at end of file
+                now_mono = time.monotonic()
+                error_backoff = 1.0 if now_mono - last_error_at > 60 else min(30.0, error_backoff * 2)
+                last_error_at = now_mono
+                time.sleep(error_backoff)
\ No newline at end of file
@@ -1,8 +1,18 @@
 import sqlite3
 import os
+import time
+import queue
+import atexit
+import threading
 from dotenv import load_dotenv
 
 class DatabaseManager:
+    # Background analyses writer: rows per transaction / max wait for a batch to fill (seconds)
+    ANALYSIS_BATCH_MAX = 256
+    ANALYSIS_BATCH_WAIT = 0.5
+    # PRAGMA user_version written after _initialize_db's DDL – bump when tables/columns/indexes change
+    SCHEMA_VERSION = 1
+
     def __init__(self):
         load_dotenv()
         
@@ -10,18 +20,40 @@ class DatabaseManager:
         
         
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        # One connection per thread (scanner, consumer, stop-loss monitor, dashboard), kept open between calls
+        self._tls = threading.local()
+        self._analysis_q = queue.Queue()
+        self._analysis_writer = None
+        self._analysis_writer_lock = threading.Lock()
         self._initialize_db()
 
     def _get_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """Persistent connection for the calling thread. `with conn:` commits/rolls back but does not close it."""
+        conn = getattr(self._tls, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            # Per-connection settings (journal_mode=WAL is persistent in the DB file, set in _initialize_db)
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._tls.conn = conn
         return conn
 
     def _initialize_db(self):
         """Create tables if not exist; run column migrations."""
         try:
             with self._get_connection() as conn:
+                # WAL: dashboard/CLI readers don't block on the bot's writes; NORMAL sync = no fsync per commit (safe with WAL)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA temp_store=MEMORY")
+                conn.execute("PRAGMA mmap_size=268435456")
+                conn.execute("PRAGMA cache_size=-20000")
+                # Already migrated: skip the DDL entirely
+                if conn.execute("PRAGMA user_version").fetchone()[0] >= self.SCHEMA_VERSION:
+                    return
                 cursor = conn.cursor()
+                # One transaction for all DDL (sqlite3 would otherwise autocommit each statement)
+                cursor.execute("BEGIN")
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS trades (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -39,19 +71,11 @@ class DatabaseManager:
                         notes TEXT
                     )
                 """)
-                conn.commit()
                 # Migration: add columns if missing
-                try:
-                    cursor.execute("ALTER TABLE trades ADD COLUMN category TEXT")
-                    conn.commit()
-                except sqlite3.OperationalError:
-                    pass
-                for col, typ in [("spread_pct", "REAL"), ("target_price", "REAL"), ("end_date_iso", "TEXT"), ("event_id", "TEXT")]:
-                    try:
+                existing = {row[1] for row in cursor.execute("PRAGMA table_info(trades)")}
+                for col, typ in [("category", "TEXT"), ("spread_pct", "REAL"), ("target_price", "REAL"), ("end_date_iso", "TEXT"), ("event_id", "TEXT")]:
+                    if col not in existing:
                         cursor.execute(f"ALTER TABLE trades ADD COLUMN {col} {typ}")
-                        conn.commit()
-                    except sqlite3.OperationalError:
-                        pass
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS analyses (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -65,6 +89,12 @@ class DatabaseManager:
                         created_at DATETIME DEFAULT CURRENT_TIMESTAMP
                     )
                 """)
+                # Status updates / flags filter on token_id, dedup on market_id, management on status='OPEN'
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_trades_token ON trades(token_id)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_trades_market ON trades(market_id)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_trades_status_open ON trades(status) WHERE status = 'OPEN'")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_analyses_created ON analyses(created_at DESC)")
+                cursor.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
                 conn.commit()
         except Exception as e:
             print(f"❌ DB Init Error: {e}")
@@ -84,15 +114,75 @@ class DatabaseManager:
             print(f"❌ DB Log Trade Error: {e}")
             return False
 
-    def log_analysis(self, question: str, category: str, action: str, reason: str = "", max_price: float = 0, current_price: float = 0, hype_score: int = 0) -> bool:
-        """Log each AI analysis (BUY/REJECT) for history and ChromaDB."""
+    def log_analysis(self, question: str, category: str, action: str, reason: str = "", max_price: float = 0, current_price: float = 0, hype_score: int = 0) -> None:
+        """Log each AI analysis (BUY/REJECT) for history and ChromaDB. Queued; the background writer reports insert errors."""
+        self.log_analyses_bulk([(question, category, action, reason, max_price, current_price, hype_score)])
+
+    def log_analyses_bulk(self, rows: list[tuple]) -> None:
+        """Queue several analyses (no result: the write happens later). rows = (question, category, action, reason, max_price, current_price, hype_score)."""
+        if not rows:
+            return
+        self._start_analysis_writer()
+        for row in rows:
+            self._analysis_q.put(row)
+
+    @staticmethod
+    def _dict_rows(cursor) -> list[dict]:
+        """Result rows as dicts in one pass: column names looked up once, no intermediate fetchall list."""
+        cursor.row_factory = None  # plain tuples – skip building a sqlite3.Row per row
+        cols = [d[0] for d in cursor.description]
+        return [dict(zip(cols, row)) for row in cursor]
+
+    def _start_analysis_writer(self) -> None:
+        if self._analysis_writer is not None:
+            return
+        with self._analysis_writer_lock:
+            if self._analysis_writer is None:
+                t = threading.Thread(target=self._analysis_writer_loop, name="magnus-db-analyses", daemon=True)
+                t.start()
+                self._analysis_writer = t
+                atexit.register(self._stop_analysis_writer)
+
+    def _stop_analysis_writer(self) -> None:
+        """Flush queued analyses on exit (sentinel makes the writer write what it has and stop)."""
+        self._analysis_q.put(None)
+        self._analysis_writer.join(timeout=5)
+
+    def _analysis_writer_loop(self) -> None:
+        """Drain up to ANALYSIS_BATCH_MAX rows (or ANALYSIS_BATCH_WAIT seconds) and insert them in one transaction."""
+        while True:
+            row = self._analysis_q.get()
+            if row is None:
+                return
+            rows = [row]
+            stop = False
+            deadline = time.monotonic() + self.ANALYSIS_BATCH_WAIT
+            while len(rows) < self.ANALYSIS_BATCH_MAX:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = self._analysis_q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is None:
+                    stop = True
+                    break
+                rows.append(row)
+            self._write_analyses(rows)
+            if stop:
+                return
+
+    def _write_analyses(self, rows: list[tuple]) -> bool:
         try:
             with self._get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
+                conn.executemany("""
                     INSERT INTO analyses (question, category, action, reason, max_price, current_price, hype_score)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (question[:2000], (category or "")[:100], action or "REJECT", (reason or "")[:1000], max_price, current_price, hype_score))
+                """, [
+                    ((q or "")[:2000], (cat or "")[:100], action or "REJECT", (reason or "")[:1000], max_price, current_price, hype_score)
+                    for q, cat, action, reason, max_price, current_price, hype_score in rows
+                ])
                 conn.commit()
                 return True
         except Exception as e:
@@ -104,24 +194,27 @@ class DatabaseManager:
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
-                sql = "SELECT id, question, category, action, reason, max_price, current_price, hype_score, created_at FROM analyses ORDER BY id DESC"
-                if limit:
-                    sql += f" LIMIT {int(limit)}"
-                cursor.execute(sql)
-                return [dict(row) for row in cursor.fetchall()]
+                # Constant SQL text (LIMIT -1 = no limit) so sqlite3's statement cache reuses the prepared plan
+                cursor.execute(
+                    "SELECT id, question, category, action, reason, max_price, current_price, hype_score, created_at "
+                    "FROM analyses ORDER BY id DESC LIMIT ?",
+                    (int(limit) if limit else -1,),
+                )
+                return self._dict_rows(cursor)
         except Exception as e:
             print(f"❌ DB Get Analyses Error: {e}")
             return []
 
     def has_ever_traded_market(self, market_id: str) -> bool:
-        """True if we ever held a position in this market (prevents re-buying after sell)."""
+        """True if we ever held a position in this market (prevents re-buying after sell).
+        Always asks SQLite (idx_trades_market) – other processes (CLI, register_orphans) insert trades too."""
         if not market_id:
             return False
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT 1 FROM trades WHERE market_id = ? LIMIT 1", (str(market_id),))
-                return cursor.fetchone() is not None
+                cursor.execute("SELECT EXISTS(SELECT 1 FROM trades WHERE market_id = ?)", (str(market_id),))
+                return bool(cursor.fetchone()[0])
         except Exception:
             return False
 
@@ -155,8 +248,7 @@ class DatabaseManager:
                     FROM trades 
                     WHERE status = 'OPEN'
                 """)
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+                return self._dict_rows(cursor)
         except Exception as e:
             print(f"❌ DB Get Open Positions Error: {e}")
             return []
@@ -166,16 +258,13 @@ class DatabaseManager:
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
-                sql = """
+                cursor.execute("""
                     SELECT id, token_id, market_id, question, category,
                            buy_price, amount_usdc, shares_bought, status,
                            timestamp, notes
-                    FROM trades ORDER BY id DESC
-                """
-                if limit:
-                    sql += f" LIMIT {int(limit)}"
-                cursor.execute(sql)
-                return [dict(row) for row in cursor.fetchall()]
+                    FROM trades ORDER BY id DESC LIMIT ?
+                """, (int(limit) if limit else -1,))
+                return self._dict_rows(cursor)
         except Exception as e:
             print(f"❌ DB Get All Trades Error: {e}")
             return []
@@ -1,5 +1,13 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Listener thread that owns the real handlers (console + file); see setup_logging().
+_listener: QueueListener | None = None
+
+# Short human-readable status lines (Trade._log_to_live) go to magnus_live.log only.
+LIVE_LOGGER_NAME = "magnus.live"
 
 
 def setup_logging() -> None:
@@ -8,8 +16,11 @@ def setup_logging() -> None:
 
     - Sets root logger to INFO.
     - Logs to both stdout and `magnus_structured.log` (rotating).
+    - Handlers run on a QueueListener thread: logging threads (scanner, stop-loss) only enqueue records.
+    - `magnus.live` records go to `magnus_live.log` ("[HH:MM:SS] msg") and not to console/structured log.
     - Run once at start of `Trade` via `setup_logging()`.
     """
+    global _listener
     root = logging.getLogger()
     if root.handlers:
         # Already configured – avoid double logging.
@@ -21,23 +32,46 @@ def setup_logging() -> None:
         datefmt="%Y-%m-%d %H:%M:%S",
     )
 
+    def _is_live(record: logging.LogRecord) -> bool:
+        return record.name == LIVE_LOGGER_NAME
+
     console = logging.StreamHandler()
     console.setFormatter(formatter)
-    root.addHandler(console)
+    console.addFilter(lambda r: not _is_live(r))
+    handlers: list[logging.Handler] = [console]
 
+    # File handlers write on the QueueListener thread, so their per-record flush is off the hot path;
+    # delay=True opens each file on its first record instead of at setup.
     try:
         file_handler = RotatingFileHandler(
             "magnus_structured.log",
             maxBytes=5_000_000,
             backupCount=3,
             encoding="utf-8",
+            delay=True,
         )
         file_handler.setFormatter(formatter)
-        root.addHandler(file_handler)
+        file_handler.addFilter(lambda r: not _is_live(r))
+        handlers.append(file_handler)
     except Exception:
         # Logging must never crash the app.
         pass
 
+    try:
+        live_handler = logging.FileHandler("magnus_live.log", encoding="utf-8", delay=True)
+        live_handler.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", datefmt="%H:%M:%S"))
+        live_handler.addFilter(_is_live)
+        handlers.append(live_handler)
+    except Exception:
+        pass
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    # Drain queued records on exit.
+    atexit.register(_listener.stop)
+
     # Tone down spam from third party (httpx/py_clob_client etc.).
     for noisy in ("httpx", "py_clob_client", "urllib3"):
         try:
@@ -1,5 +1,4 @@
 import threading
-import time
 from typing import Iterable, Optional
 
 
@@ -50,6 +49,7 @@ class MagnusObserver(threading.Thread):
     # Thread loop: does nothing heavy; can be extended with websockets in future.
 
     def run(self) -> None:
-        while not self._stop.is_set():
-            time.sleep(5.0)
+        # Event wait instead of sleep: stop() ends the thread immediately rather than after up to 5s
+        while not self._stop.wait(5.0):
+            pass
 
@@ -1,3 +1,8 @@
+import atexit
+import contextlib
+import heapq
+import importlib.util
+import json
 import logging
 import os
 import threading
@@ -22,8 +27,15 @@ from py_clob_client.clob_types import (
 )
 
 
+
 load_dotenv()
 
+# Response bodies: orjson if installed (several times faster on large Gamma pages), else stdlib json.
+try:
+    from orjson import loads as _loads
+except ImportError:
+    _loads = json.loads
+
 
 class OrphanPositionError(Exception):
     """Sell failed with 'not enough balance/allowance' – position may be orphan (DB has it but CLOB doesn't see token)."""
@@ -77,6 +89,27 @@ def _install_clob_verify_patch() -> None:
 # Run after ClobClient import
 _install_clob_verify_patch()
 
+# Proxy wallets: some L2 calls must carry POLY_ADDRESS = funder. Set per thread by Polymarket._l2_as_funder.
+_l2_tls = threading.local()
+
+
+def _install_l2_funder_patch() -> None:
+    """Wraps create_level_2_headers once (instead of swapping it per call, which races between threads)."""
+    from py_clob_client.headers import headers as _l2_headers
+    _orig_l2 = _l2_headers.create_level_2_headers
+
+    def _l2_with_funder(signer, creds, request_args):
+        h = _orig_l2(signer, creds, request_args)
+        funder = getattr(_l2_tls, "funder", None)
+        if funder:
+            h[_l2_headers.POLY_ADDRESS] = funder
+        return h
+
+    _l2_headers.create_level_2_headers = _l2_with_funder
+
+
+_install_l2_funder_patch()
+
 
 class Polymarket:
     """
@@ -116,7 +149,7 @@ class Polymarket:
             )
             if r.status_code != 200:
                 return None
-            data = r.json()
+            data = _loads(r.content)
             proxy = data.get("proxyWallet") or data.get("proxy_wallet")
             if proxy and isinstance(proxy, str) and proxy.strip().startswith("0x"):
                 return proxy.strip()
@@ -195,7 +228,7 @@ class Polymarket:
                             "params": [eoa, "latest"],
                         }
                         r = httpx.post(rpc, json=payload, timeout=10.0)
-                        res = r.json().get("result")
+                        res = _loads(r.content).get("result")
                         if isinstance(res, str) and res.startswith("0x"):
                             nonce = int(res, 16)
                     except Exception:
@@ -233,12 +266,41 @@ class Polymarket:
         except Exception:
             pass
 
+        # One pooled HTTP client for Gamma / prices-history / data-api / RPC calls (keep-alive instead of a
+        # TCP+TLS handshake per request). CLOB calls go through py_clob_client's own client.
+        # HTTP/2 (one multiplexed connection per host) when the optional h2 package is installed.
+        _http2 = importlib.util.find_spec("h2") is not None
+        self._http = httpx.Client(
+            timeout=httpx.Timeout(15.0, connect=5.0),
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32, keepalive_expiry=60.0),
+            transport=httpx.HTTPTransport(retries=3, http2=_http2),
+        )
+        atexit.register(self.close)
+
         # Short-lived cache for price/book/history (reduces CLOB calls within same round).
         self._cache_ttl = float(os.getenv("MAGNUS_CACHE_TTL_SECONDS", "45"))
         self._cache_price: Dict[str, Tuple[float, float]] = {}
         self._cache_book: Dict[str, Tuple[Tuple[Optional[float], Optional[float], float], float]] = {}
         self._cache_history: Dict[str, Tuple[List[Dict[str, Any]], float]] = {}
+        # (ask_liquidity_usdc, best_ask) for top 3 ask levels – filled by get_book from the same order book.
+        self._cache_ask_liq: Dict[str, Tuple[Tuple[float, Optional[float]], float]] = {}
         self._cache_lock = threading.Lock()
+        # tick_size/neg_risk per token for order options – near-static, so kept much longer than prices.
+        # (Polymarket does change tick size near 0/1, hence a TTL rather than forever.)
+        try:
+            self._tick_ttl = float(os.getenv("MAGNUS_TICK_TTL_SECONDS", "600"))
+        except ValueError:
+            self._tick_ttl = 600.0
+        self._cache_order_opts: Dict[str, Tuple[PartialCreateOrderOptions, float]] = {}
+        # Gamma /events pages by query (params incl. offset) -> (ETag, body) for If-None-Match polling
+        self._gamma_pages: Dict[tuple, Tuple[str, List[Dict[str, Any]]]] = {}
+        # Raw order books for a fraction of a second: back-to-back readers (get_book, ask-liquidity check before
+        # an order) share one CLOB fetch, while orders still see a book that is effectively fresh.
+        try:
+            self._book_raw_ttl = float(os.getenv("MAGNUS_BOOK_RAW_TTL_SECONDS", "0.4"))
+        except ValueError:
+            self._book_raw_ttl = 0.4
+        self._cache_book_raw: Dict[str, Tuple[Any, float]] = {}
         # On get_balance_allowance error use last successful balance so we don't show 0 and pause unnecessarily.
         self._last_balance: Optional[float] = None
 
@@ -308,6 +370,24 @@ class Polymarket:
             self._heartbeat_thread.join(timeout=6.0)
             self._heartbeat_thread = None
 
+    def close(self) -> None:
+        """Stop the heartbeat and close pooled HTTP connections (registered with atexit)."""
+        self.stop_heartbeat()
+        try:
+            self._http.close()
+        except Exception:
+            pass
+
+    @contextlib.contextmanager
+    def _l2_as_funder(self):
+        """Inside the block, L2 headers on this thread carry POLY_ADDRESS = funder (proxy wallets only)."""
+        prev = getattr(_l2_tls, "funder", None)
+        _l2_tls.funder = self._l2_funder_for_balance or prev
+        try:
+            yield
+        finally:
+            _l2_tls.funder = prev
+
     def get_open_orders(self, asset_id: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
         """Fetches open orders from CLOB. asset_id = token_id to filter.
         For proxy (type 2) we patch POLY_ADDRESS to funder so we get orders for correct account (same as polymarket.com shows).
@@ -315,20 +395,9 @@ class Polymarket:
         for attempt in range(3):
             try:
                 from py_clob_client.clob_types import OpenOrderParams
-                from py_clob_client.headers import headers as _l2_headers
                 params = OpenOrderParams(asset_id=asset_id) if asset_id else None
-                orig_l2 = _l2_headers.create_level_2_headers
-                if self._l2_funder_for_balance:
-                    def _l2_with_funder(signer, creds, request_args):
-                        h = orig_l2(signer, creds, request_args)
-                        h[_l2_headers.POLY_ADDRESS] = self._l2_funder_for_balance
-                        return h
-                    _l2_headers.create_level_2_headers = _l2_with_funder
-                try:
+                with self._l2_as_funder():
                     return self.client.get_orders(params) or []
-                finally:
-                    if self._l2_funder_for_balance:
-                        _l2_headers.create_level_2_headers = orig_l2
             except Exception as e:
                 err_str = str(e).lower()
                 is_retryable = "request exception" in err_str or "timeout" in err_str or "connection" in err_str
@@ -351,9 +420,9 @@ class Polymarket:
             return None
         return val
 
-    def _set_cached(self, cache: Dict[str, Tuple[Any, float]], key: str, val: Any) -> None:
+    def _set_cached(self, cache: Dict[str, Tuple[Any, float]], key: str, val: Any, ttl: Optional[float] = None) -> None:
         with self._cache_lock:
-            cache[key] = (val, time.time() + self._cache_ttl)
+            cache[key] = (val, time.time() + (self._cache_ttl if ttl is None else ttl))
 
     # --- Event discovery (Gamma) -------------------------------------------------
 
@@ -370,6 +439,17 @@ class Polymarket:
             return str(tags[0])
         return "Unknown"
 
+    @staticmethod
+    def _copy_events(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Copies of events and their market dicts – callers (scanner) edit both in place, the ETag cache must not see it."""
+        out = []
+        for e in events:
+            e = dict(e)
+            if isinstance(e.get("markets"), list):
+                e["markets"] = [dict(m) if isinstance(m, dict) else m for m in e["markets"]]
+            out.append(e)
+        return out
+
     def get_all_events(self, strategy: str = "trending", limit: int = 1000) -> List[Dict[str, Any]]:
         """
         Fetches active events via Gamma API.
@@ -410,10 +490,22 @@ class Polymarket:
         try:
             while len(events) < limit:
                 params["offset"] = str(offset)
-                resp = httpx.get(self.GAMMA_EVENTS_ENDPOINT, params=params, timeout=10.0)
-                if resp.status_code != 200:
+                # Conditional GET: an unchanged page comes back as 304 and we reuse the last body
+                page_key = tuple(sorted(params.items()))
+                with self._cache_lock:
+                    prev = self._gamma_pages.get(page_key)
+                headers = {"If-None-Match": prev[0]} if prev else None
+                resp = self._http.get(self.GAMMA_EVENTS_ENDPOINT, params=params, headers=headers, timeout=10.0)
+                if resp.status_code == 304 and prev:
+                    batch = self._copy_events(prev[1])
+                elif resp.status_code != 200:
                     break
-                batch = resp.json()
+                else:
+                    batch = _loads(resp.content)
+                    etag = resp.headers.get("etag")
+                    if etag and isinstance(batch, list):
+                        with self._cache_lock:
+                            self._gamma_pages[page_key] = (etag, self._copy_events(batch))
                 if not isinstance(batch, list) or not batch:
                     break
                 events.extend(batch)
@@ -436,14 +528,14 @@ class Polymarket:
         # First: try markets endpoint with pagination (faster for active markets)
         try:
             for offset in range(0, 5000, 100):
-                resp = httpx.get(
+                resp = self._http.get(
                     self.GAMMA_MARKETS_ENDPOINT,
                     params={"active": "true", "closed": "false", "limit": "100", "offset": str(offset)},
                     timeout=15.0,
                 )
                 if resp.status_code != 200:
                     break
-                batch = resp.json()
+                batch = _loads(resp.content)
                 if not isinstance(batch, list) or not batch:
                     break
                 for m in batch:
@@ -475,14 +567,14 @@ class Polymarket:
         # Fallback: iterate events (includes closed markets)
         try:
             for offset in range(0, 3000, 100):
-                resp = httpx.get(
+                resp = self._http.get(
                     self.GAMMA_EVENTS_ENDPOINT,
                     params={"limit": "100", "offset": str(offset)},
                     timeout=15.0,
                 )
                 if resp.status_code != 200:
                     break
-                events = resp.json()
+                events = _loads(resp.content)
                 if not isinstance(events, list) or not events:
                     break
                 for ev in events:
@@ -547,6 +639,16 @@ class Polymarket:
             self._set_cached(self._cache_price, key, result)
         return result
 
+    def _fetch_order_book(self, token_id: str):
+        """CLOB order book for token_id, shared for MAGNUS_BOOK_RAW_TTL_SECONDS. Raises like client.get_order_book."""
+        key = str(token_id)
+        cached = self._get_cached(self._cache_book_raw, key)
+        if cached is not None:
+            return cached
+        book = self.client.get_order_book(key)
+        self._set_cached(self._cache_book_raw, key, book, ttl=self._book_raw_ttl)
+        return book
+
     def get_book(self, token_id: str) -> Tuple[Optional[float], Optional[float], float]:
         """
         Returns (bid, ask, bid_liquidity_usdc) for token_id.
@@ -557,28 +659,18 @@ class Polymarket:
         if cached is not None:
             return cached
         try:
-            book = self.client.get_order_book(key)
+            book = self._fetch_order_book(key)
         except Exception:
             return None, None, 0.0
-        bids = book.bids or []
-        asks = book.asks or []
-        def _norm(p):
-            if p is None: return None
-            v = float(p)
-            return v / 100.0 if v > 1.0 else v
-        best_bid = _norm(bids[0].price) if bids and bids[0].price is not None else None
-        best_ask = _norm(asks[0].price) if asks and asks[0].price is not None else None
-        bid_liquidity = 0.0
-        for lvl in bids[:3]:
-            try:
-                p = float(lvl.price)
-                if p > 1.0:
-                    p = p / 100.0
-                bid_liquidity += p * float(lvl.size)
-            except (TypeError, ValueError):
-                continue
+        top_bids = self._top_levels(book.bids or [], 3, highest=True)
+        top_asks = self._top_levels(book.asks or [], 3, highest=False)
+        best_bid = top_bids[0][0] if top_bids else None
+        best_ask = top_asks[0][0] if top_asks else None
+        bid_liquidity = sum(p * sz for p, sz in top_bids)
         result = (best_bid, best_ask, bid_liquidity)
         self._set_cached(self._cache_book, key, result)
+        # Same book gives the ask-side estimate for free – scanner reads it via _get_ask_liquidity_usdc(use_cache=True).
+        self._set_cached(self._cache_ask_liq, key, (sum(p * sz for p, sz in top_asks), best_ask))
         return result
 
     def get_price_history(self, token_id: str) -> List[Dict[str, Any]]:
@@ -595,13 +687,13 @@ class Polymarket:
             import time as _time
             end_ts = int(_time.time())
             start_ts = end_ts - 7 * 86400  # 7 days back
-            resp = httpx.get(
+            resp = self._http.get(
                 f"{self.CLOB_HOST}/prices-history",
                 params={"market": key, "interval": "1h", "startTs": start_ts, "endTs": end_ts},
                 timeout=8.0,
             )
             if resp.status_code == 200:
-                data = resp.json()
+                data = _loads(resp.content)
                 raw = (data or {}).get("history") or []
                 if isinstance(raw, list) and raw:
                     result = []
@@ -612,7 +704,7 @@ class Polymarket:
                                 p = float(p)
                                 if p > 1.0:
                                     p = p / 100.0
-                                result.append({"p": p})
+                                result.append({"t": point.get("t"), "p": p})
                             except (TypeError, ValueError):
                                 continue
                     if result:
@@ -655,8 +747,8 @@ class Polymarket:
                 "method": "eth_call",
                 "params": [{"to": self.USDC_E_ADDRESS, "data": data}, "latest"],
             }
-            resp = httpx.post(rpc_url, json=payload, timeout=10.0)
-            body = resp.json()
+            resp = self._http.post(rpc_url, json=payload, timeout=10.0)
+            body = _loads(resp.content)
             result = body.get("result")
             if not isinstance(result, str) or not result.startswith("0x"):
                 return None, addr
@@ -673,26 +765,16 @@ class Polymarket:
         Requires L2 auth; returns 0 on error.
         For proxy (type 1/2) we patch POLY_ADDRESS to funder only here so post_order uses signer.
         """
-        from py_clob_client.headers import headers as _l2_headers
-        orig_l2 = _l2_headers.create_level_2_headers
-        if self._l2_funder_for_balance:
-            def _l2_with_funder(signer, creds, request_args):
-                h = orig_l2(signer, creds, request_args)
-                h[_l2_headers.POLY_ADDRESS] = self._l2_funder_for_balance
-                return h
-            _l2_headers.create_level_2_headers = _l2_with_funder
         try:
             sig_type = int(os.getenv("POLYGON_SIGNATURE_TYPE", "2"))
             params = BalanceAllowanceParams(asset_type=AssetType.COLLATERAL, signature_type=sig_type)
-            data = self.client.get_balance_allowance(params)
+            with self._l2_as_funder():
+                data = self.client.get_balance_allowance(params)
         except Exception as e:
             if self._last_balance is not None:
                 return float(self._last_balance)
             logger.warning("get_balance_allowance error (no cache): %s", e)
             return 0.0
-        finally:
-            if self._l2_funder_for_balance:
-                _l2_headers.create_level_2_headers = orig_l2
 
         if isinstance(data, dict):
             onchain, addr = self._get_onchain_usdce_balance()
@@ -727,14 +809,14 @@ class Polymarket:
         if not addr or not addr.startswith("0x"):
             return []
         try:
-            resp = httpx.get(
+            resp = self._http.get(
                 self.DATA_API_POSITIONS_URL,
                 params={"user": addr, "limit": "500"},
                 timeout=15.0,
             )
             if resp.status_code != 200:
                 return []
-            data = resp.json()
+            data = _loads(resp.content)
             return data if isinstance(data, list) else []
         except Exception as e:
             logger.warning("Data API positions: %s", str(e)[:80])
@@ -769,21 +851,11 @@ class Polymarket:
         positions: List[Dict[str, Any]] = []
 
         # 1. Try CLOB (works for EOA)
-        from py_clob_client.headers import headers as _l2_headers
-        orig_l2 = _l2_headers.create_level_2_headers
-        if self._l2_funder_for_balance:
-            def _l2_with_funder(signer, creds, request_args):
-                h = orig_l2(signer, creds, request_args)
-                h[_l2_headers.POLY_ADDRESS] = self._l2_funder_for_balance
-                return h
-            _l2_headers.create_level_2_headers = _l2_with_funder
         try:
-            positions = self.client.get_positions() or []
+            with self._l2_as_funder():
+                positions = self.client.get_positions() or []
         except Exception:
             pass
-        finally:
-            if self._l2_funder_for_balance:
-                _l2_headers.create_level_2_headers = orig_l2
 
         # 2. Fallback: Data API for proxy when CLOB returns empty
         if not positions and self._l2_funder_for_balance:
@@ -817,8 +889,6 @@ class Polymarket:
         """
         if self._l2_funder_for_balance:
             return self.get_all_token_balances().get(str(token_id), 0.0)
-        from py_clob_client.headers import headers as _l2_headers
-        orig_l2 = _l2_headers.create_level_2_headers
         try:
             positions = self.client.get_positions() or []
         except Exception:
@@ -835,36 +905,56 @@ class Polymarket:
 
     # --- Orders ------------------------------------------------------------------
 
-    def _get_ask_liquidity_usdc(self, token_id: str, levels: int = 3) -> Tuple[float, Optional[float]]:
+    @staticmethod
+    def _top_levels(levels: list, n: int, highest: bool) -> List[Tuple[float, float]]:
+        """
+        Best n (price, size) levels, best first – chosen by price, not by list position (the CLOB
+        lists levels with the best price last). One pass + small heap, no sort of the whole side.
+        """
+        parsed = []
+        for lvl in levels:
+            try:
+                price = float(getattr(lvl, "price", 0) or 0)
+                if price > 1.0:
+                    price = price / 100.0
+                size = float(getattr(lvl, "size", 0) or 0)
+            except (TypeError, ValueError):
+                continue
+            if price > 0 and size > 0:
+                parsed.append((price, size))
+        n = max(1, int(n))
+        return heapq.nlargest(n, parsed) if highest else heapq.nsmallest(n, parsed)
+
+    @classmethod
+    def _sum_ask_levels(cls, asks: list, levels: int) -> Tuple[float, Optional[float]]:
+        """Sum price * size over the best N ask levels; returns (total_usdc, best_ask)."""
+        top = cls._top_levels(asks, levels, highest=False)
+        return sum(p * sz for p, sz in top), (top[0][0] if top else None)
+
+    def _get_ask_liquidity_usdc(self, token_id: str, levels: int = 3, use_cache: bool = False) -> Tuple[float, Optional[float]]:
         """
         Rough estimate of how much USDC we can realistically spend directly against
         the book's ask side without triggering FOK "no match", plus best ask price.
 
         We sum price * size for the first N ask levels and interpret it as
         max "market value" actually available to hit right now.
+        use_cache=True (scanner) reuses the book already fetched by get_book; orders always read fresh.
         """
+        key = str(token_id)
+        if use_cache and int(levels) == 3:
+            cached = self._get_cached(self._cache_ask_liq, key)
+            if cached is None:
+                self.get_book(key)
+                cached = self._get_cached(self._cache_ask_liq, key)
+            if cached is not None:
+                return cached
         try:
-            book = self.client.get_order_book(str(token_id))
+            book = self._fetch_order_book(key)
         except Exception:
             return 0.0, None
 
         asks = getattr(book, "asks", None) or []
-        total = 0.0
-        best_ask: Optional[float] = None
-        for idx, lvl in enumerate(asks[: max(1, int(levels))]):
-            try:
-                price = float(getattr(lvl, "price", 0) or 0)
-                if price > 1.0:
-                    price = price / 100.0
-                size = float(getattr(lvl, "size", 0) or 0)
-                if price <= 0 or size <= 0:
-                    continue
-                if idx == 0:
-                    best_ask = price
-                total += price * size
-            except (TypeError, ValueError):
-                continue
-        return total, best_ask
+        return self._sum_ask_levels(asks, levels)
 
     # Giltiga tick sizes enligt https://docs.polymarket.com/trading/orders/create (Order Options)
     _VALID_TICK_SIZES = ("0.1", "0.01", "0.001", "0.0001")
@@ -874,7 +964,17 @@ class Polymarket:
         Fetches tick_size and neg_risk for orders (per docs: options required for create_order/create_market_order).
         Tries get_market(condition_id) if condition_id exists, else get_tick_size/get_neg_risk per token_id.
         tick_size normalised to one of API's allowed values (0.1, 0.01, 0.001, 0.0001).
+        Cached per token for MAGNUS_TICK_TTL_SECONDS (repeat buys/sells skip the lookup round trip).
         """
+        key = str(token_id)
+        cached = self._get_cached(self._cache_order_opts, key)
+        if cached is not None:
+            return cached
+        options = self._fetch_order_options(token_id, condition_id)
+        self._set_cached(self._cache_order_opts, key, options, ttl=self._tick_ttl)
+        return options
+
+    def _fetch_order_options(self, token_id: str, condition_id: Optional[str] = None) -> PartialCreateOrderOptions:
         def _norm_tick(s: str) -> str:
             if s in self._VALID_TICK_SIZES:
                 return s
@@ -924,33 +1024,6 @@ class Polymarket:
             raw_amount = float(amount_usdc)
             ask_liq, best_ask = self._get_ask_liquidity_usdc(token_id)
             effective_amount = raw_amount
-            # region agent log
-            try:
-                import json as _json
-                with open("/home/kim/agents/.cursor/debug-ed1d60.log", "a", encoding="utf-8") as _fdbg:
-                    _fdbg.write(
-                        _json.dumps(
-                            {
-                                "sessionId": "ed1d60",
-                                "runId": "pre-fix",
-                                "hypothesisId": "H4",
-                                "location": "polymarket.py:execute_market_order",
-                                "message": "execute_market_order_entry",
-                                "data": {
-                                    "token_id": token_id,
-                                    "raw_amount": raw_amount,
-                                    "max_price": float(max_price) if max_price is not None else None,
-                                    "ask_liq_usdc": float(ask_liq),
-                                    "best_ask": float(best_ask) if best_ask else None,
-                                },
-                                "timestamp": int(time.time() * 1000),
-                            }
-                        )
-                        + "\n"
-                    )
-            except Exception:
-                pass
-            # endregion
 
             # Case 1: asks exist → try taker FOK against existing liquidity.
             if ask_liq > 0:
@@ -965,27 +1038,6 @@ class Polymarket:
                         f"⚠️ [Polymarket] Ask liquidity {ask_liq:.4f} too low for min buy on token {token_id} "
                         f"(best_ask={best_ask}, min_amount={min_amount:.2f})."
                     )
-                    # region agent log
-                    try:
-                        import json as _json
-                        with open("/home/kim/agents/.cursor/debug-ed1d60.log", "a", encoding="utf-8") as _fdbg:
-                            _fdbg.write(
-                                _json.dumps(
-                                    {
-                                        "sessionId": "ed1d60",
-                                        "runId": "pre-fix",
-                                        "hypothesisId": "H4",
-                                        "location": "polymarket.py:execute_market_order",
-                                        "message": "execute_market_order_abort_low_ask_liq",
-                                        "data": {"token_id": token_id, "ask_liq_usdc": float(ask_liq), "min_amount": float(min_amount), "best_ask": float(best_ask) if best_ask else None},
-                                        "timestamp": int(time.time() * 1000),
-                                    }
-                                )
-                                + "\n"
-                            )
-                    except Exception:
-                        pass
-                    # endregion
                     return None
 
                 # We can never buy more than actually exists on ask side.
@@ -1042,27 +1094,6 @@ class Polymarket:
                         raise fok_last_err
                 if not res:
                     print(f"⚠️ [Polymarket] post_order returned empty response for token {token_id} (amount {effective_amount}).")
-                    # region agent log
-                    try:
-                        import json as _json
-                        with open("/home/kim/agents/.cursor/debug-ed1d60.log", "a", encoding="utf-8") as _fdbg:
-                            _fdbg.write(
-                                _json.dumps(
-                                    {
-                                        "sessionId": "ed1d60",
-                                        "runId": "pre-fix",
-                                        "hypothesisId": "H4",
-                                        "location": "polymarket.py:execute_market_order",
-                                        "message": "execute_market_order_post_order_empty",
-                                        "data": {"token_id": token_id, "effective_amount": float(effective_amount)},
-                                        "timestamp": int(time.time() * 1000),
-                                    }
-                                )
-                                + "\n"
-                            )
-                    except Exception:
-                        pass
-                    # endregion
                     return None
                 if isinstance(res, dict) and res.get("error"):
                     err = res.get("error")
@@ -1070,27 +1101,6 @@ class Polymarket:
                     if "FOK" in err_str.upper() or "NOT_FILLED" in err_str.upper():
                         print(f"⚠️ [Polymarket] FOK failed – no liquidity at our max price. Best ask too high?")
                     print(f"⚠️ [Polymarket] post_order error for token {token_id}: {err_str[:160]}")
-                    # region agent log
-                    try:
-                        import json as _json
-                        with open("/home/kim/agents/.cursor/debug-ed1d60.log", "a", encoding="utf-8") as _fdbg:
-                            _fdbg.write(
-                                _json.dumps(
-                                    {
-                                        "sessionId": "ed1d60",
-                                        "runId": "pre-fix",
-                                        "hypothesisId": "H4",
-                                        "location": "polymarket.py:execute_market_order",
-                                        "message": "execute_market_order_post_order_error",
-                                        "data": {"token_id": token_id, "error": err_str[:200]},
-                                        "timestamp": int(time.time() * 1000),
-                                    }
-                                )
-                                + "\n"
-                            )
-                    except Exception:
-                        pass
-                    # endregion
                     return None
                 order_id = None
                 if isinstance(res, dict):
@@ -1099,49 +1109,7 @@ class Polymarket:
                 if not order_id:
                     # Unexpected structure – log truncated response.
                     print(f"⚠️ [Polymarket] post_order unexpected response for token {token_id}: {(str(res)[:200])!r}")
-                    # region agent log
-                    try:
-                        import json as _json
-                        with open("/home/kim/agents/.cursor/debug-ed1d60.log", "a", encoding="utf-8") as _fdbg:
-                            _fdbg.write(
-                                _json.dumps(
-                                    {
-                                        "sessionId": "ed1d60",
-                                        "runId": "pre-fix",
-                                        "hypothesisId": "H4",
-                                        "location": "polymarket.py:execute_market_order",
-                                        "message": "execute_market_order_unexpected_response",
-                                        "data": {"token_id": token_id, "res": str(res)[:220]},
-                                        "timestamp": int(time.time() * 1000),
-                                    }
-                                )
-                                + "\n"
-                            )
-                    except Exception:
-                        pass
-                    # endregion
                     return None
-                # region agent log
-                try:
-                    import json as _json
-                    with open("/home/kim/agents/.cursor/debug-ed1d60.log", "a", encoding="utf-8") as _fdbg:
-                        _fdbg.write(
-                            _json.dumps(
-                                {
-                                    "sessionId": "ed1d60",
-                                    "runId": "pre-fix",
-                                    "hypothesisId": "H4",
-                                    "location": "polymarket.py:execute_market_order",
-                                    "message": "execute_market_order_success",
-                                    "data": {"token_id": token_id, "order_id": str(order_id)},
-                                    "timestamp": int(time.time() * 1000),
-                                }
-                            )
-                            + "\n"
-                        )
-                except Exception:
-                    pass
-                # endregion
                 return order_id
 
             # Case 2: no ask liquidity → maker BUY (GTC). MAGNUS_BUY_FOK_ONLY=1: skip, buy ONLY on FOK.
@@ -1171,65 +1139,11 @@ class Polymarket:
                 # Final limit price = min(cap, price-for-5-shares)
                 limit_price = max(0.01, min(limit_price_cap, price_for_five))
                 est_shares = raw_amount / limit_price if limit_price > 0 else 0.0
-                # region agent log
-                try:
-                    import json as _json
-                    with open("/home/kim/agents/.cursor/debug-ed1d60.log", "a", encoding="utf-8") as _fdbg:
-                        _fdbg.write(
-                            _json.dumps(
-                                {
-                                    "sessionId": "ed1d60",
-                                    "runId": "pre-fix",
-                                    "hypothesisId": "H5",
-                                    "location": "polymarket.py:execute_market_order",
-                                    "message": "maker_price_and_size",
-                                    "data": {
-                                        "token_id": token_id,
-                                        "raw_amount": float(raw_amount),
-                                        "limit_price_cap": float(limit_price_cap),
-                                        "price_for_five": float(price_for_five),
-                                        "limit_price": float(limit_price),
-                                        "est_shares": float(est_shares),
-                                    },
-                                    "timestamp": int(time.time() * 1000),
-                                }
-                            )
-                            + "\n"
-                        )
-                except Exception:
-                    pass
-                # endregion
                 if est_shares < 5.0:
                     print(
                         f"⚠️ [Polymarket] Even after price adjust, estimated shares {est_shares:.2f} < 5 for maker BUY on token {token_id} "
                         f"(amount={raw_amount:.2f}, price={limit_price:.3f}); skipping."
                     )
-                    # region agent log
-                    try:
-                        import json as _json
-                        with open("/home/kim/agents/.cursor/debug-ed1d60.log", "a", encoding="utf-8") as _fdbg:
-                            _fdbg.write(
-                                _json.dumps(
-                                    {
-                                        "sessionId": "ed1d60",
-                                        "runId": "pre-fix",
-                                        "hypothesisId": "H5",
-                                        "location": "polymarket.py:execute_market_order",
-                                        "message": "maker_est_shares_too_low",
-                                        "data": {
-                                            "token_id": token_id,
-                                            "raw_amount": float(raw_amount),
-                                            "limit_price": float(limit_price),
-                                            "est_shares": float(est_shares),
-                                        },
-                                        "timestamp": int(time.time() * 1000),
-                                    }
-                                )
-                                + "\n"
-                            )
-                    except Exception:
-                        pass
-                    # endregion
                     return None
 
                 try:
@@ -1258,60 +1172,11 @@ class Polymarket:
                             raise last_err
                     if not res:
                         print(f"⚠️ [Polymarket] post_order (maker BUY) returned empty response for token {token_id}.")
-                        # region agent log
-                        try:
-                            import json as _json
-                            with open("/home/kim/agents/.cursor/debug-ed1d60.log", "a", encoding="utf-8") as _fdbg:
-                                _fdbg.write(
-                                    _json.dumps(
-                                        {
-                                            "sessionId": "ed1d60",
-                                            "runId": "pre-fix",
-                                            "hypothesisId": "H5",
-                                            "location": "polymarket.py:execute_market_order",
-                                            "message": "maker_post_order_empty",
-                                            "data": {
-                                                "token_id": token_id,
-                                                "limit_price": float(limit_price),
-                                                "est_shares": float(est_shares),
-                                            },
-                                            "timestamp": int(time.time() * 1000),
-                                        }
-                                    )
-                                    + "\n"
-                                )
-                        except Exception:
-                            pass
-                        # endregion
                         return None
                     if isinstance(res, dict) and res.get("error"):
                         err = res.get("error")
                         err_str = (err.get("message") if isinstance(err, dict) else str(err)) if err is not None else "Unknown error"
                         print(f"⚠️ [Polymarket] post_order (maker BUY) error for token {token_id}: {err_str[:160]}")
-                        # region agent log
-                        try:
-                            import json as _json
-                            with open("/home/kim/agents/.cursor/debug-ed1d60.log", "a", encoding="utf-8") as _fdbg:
-                                _fdbg.write(
-                                    _json.dumps(
-                                        {
-                                            "sessionId": "ed1d60",
-                                            "runId": "pre-fix",
-                                            "hypothesisId": "H5",
-                                            "location": "polymarket.py:execute_market_order",
-                                            "message": "maker_post_order_error",
-                                            "data": {
-                                                "token_id": token_id,
-                                                "error": err_str[:200],
-                                            },
-                                            "timestamp": int(time.time() * 1000),
-                                        }
-                                    )
-                                    + "\n"
-                                )
-                        except Exception:
-                            pass
-                        # endregion
                         return None
                     order_id = None
                     if isinstance(res, dict):
@@ -1379,19 +1244,8 @@ class Polymarket:
             options = self._get_order_options(str(token_id))
             signed = self.client.create_order(order_args, options)
             # Proxy: patch POLY_ADDRESS to funder so CLOB checks balance on correct account (token sits with funder).
-            from py_clob_client.headers import headers as _l2_headers
-            orig_l2 = _l2_headers.create_level_2_headers
-            if self._l2_funder_for_balance:
-                def _l2_with_funder(signer, creds, request_args):
-                    h = orig_l2(signer, creds, request_args)
-                    h[_l2_headers.POLY_ADDRESS] = self._l2_funder_for_balance
-                    return h
-                _l2_headers.create_level_2_headers = _l2_with_funder
-            try:
+            with self._l2_as_funder():
                 res = self.client.post_order(signed, OrderType.GTC)
-            finally:
-                if self._l2_funder_for_balance:
-                    _l2_headers.create_level_2_headers = orig_l2
             if not res:
                 logger.warning("execute_sell_order: post_order returned empty for token %s", token_id)
                 return False
@@ -17,7 +17,15 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# orjson for reading the balance log if installed, else stdlib json (both accept bytes).
+try:
+    from orjson import loads as _loads
+except ImportError:
+    _loads = json.loads
+
 BALANCE_LOG_PATH = os.getenv("MAGNUS_BALANCE_LOG", "data/balance_history.jsonl")
+# Sidecar with just the current peak, next to the balance log – startup reads it instead of scanning the log.
+PEAK_PATH = str(Path(BALANCE_LOG_PATH).with_name("balance_peak.json"))
 MAX_DRAWDOWN_PCT = float(os.getenv("MAGNUS_MAX_DRAWDOWN_PCT", "30"))
 MAX_CORRELATED_POSITIONS = int(os.getenv("MAGNUS_MAX_CORRELATED", "3"))
 
@@ -31,15 +39,22 @@ class PortfolioRiskManager:
         self._load_peak()
 
     def _load_peak(self) -> None:
-        """Load historical peak balance from log file, if it exists."""
+        """Load historical peak balance: peak sidecar if present, else scan the log file, if it exists."""
         path = Path(BALANCE_LOG_PATH)
         if not path.exists():
+            # No log = fresh start (or deliberately reset) – ignore any leftover sidecar.
+            return
+        try:
+            with open(PEAK_PATH, "r", encoding="utf-8") as f:
+                self._peak_balance = float(json.load(f).get("peak") or 0)
             return
+        except Exception:
+            pass
         try:
-            with path.open("r", encoding="utf-8") as f:
+            with path.open("rb") as f:
                 for line in f:
                     try:
-                        entry = json.loads(line.strip())
+                        entry = _loads(line)
                     except Exception:
                         continue
                     bal = float(entry.get("balance") or 0)
@@ -71,6 +86,17 @@ class PortfolioRiskManager:
                 f.write(json.dumps(entry) + "\n")
         except Exception:
             pass
+        self._write_peak()
+
+    def _write_peak(self) -> None:
+        """Atomically replace the peak sidecar (temp file + rename) so a crash never leaves it half-written."""
+        tmp = PEAK_PATH + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"peak": round(self._peak_balance, 2)}, f)
+            os.replace(tmp, PEAK_PATH)
+        except Exception:
+            pass
 
     def check_drawdown(self, current_balance: float) -> tuple[bool, float]:
         """
@@ -89,7 +115,7 @@ class PortfolioRiskManager:
         drawdown = ((self._peak_balance - current_balance) / self._peak_balance) * 100.0
         return drawdown >= MAX_DRAWDOWN_PCT, round(drawdown, 1)
 
-    def check_correlation(self, new_event_title: str, new_category: str) -> bool:
+    def check_correlation(self, new_event_title: str, new_category: str, positions: list | None = None) -> bool:
         """
         True if a new position would over-expose us in the same category.
 
@@ -97,22 +123,25 @@ class PortfolioRiskManager:
         - Compare title words (>= 4 chars) between new candidate and existing trades in same category.
         - If we find at least two "shared" words for a trade it counts as correlated.
         - If number of correlated trades reaches MAX_CORRELATED_POSITIONS → block new trade.
-        """
-        positions = self.db.get_open_positions()
-        if not positions:
-            return False
 
+        positions: open positions if the caller already has them (skips the DB read).
+        """
         new_lower = (new_event_title or "").lower()
-        new_cat = (new_category or "").strip()
-
         tokens = [
             w
             for w in new_lower.replace("[", " ").replace("]", " ").split()
             if len(w) >= 4
         ]
-        if not tokens:
+        # Fewer than two words can never give two shared words – no need to look at positions.
+        if len(tokens) < 2:
             return False
 
+        if positions is None:
+            positions = self.db.get_open_positions()
+        if not positions:
+            return False
+        new_cat = (new_category or "").strip()
+
         correlated_count = 0
         for p in positions:
             q = (p.get("question") or "").lower()
@@ -2,7 +2,9 @@ import os
 import asyncio
 import httpx
 import re
+import weakref
 import threading
+import contextlib
 from datetime import datetime, timezone
 from dotenv import load_dotenv
 
@@ -74,6 +76,27 @@ class MagnusWarRoom:
         self.model_scout = os.getenv("MAGNUS_MODEL_SCOUT", "grok-4-1-fast-non-reasoning")
         self.model_lawyer = os.getenv("MAGNUS_MODEL_LAWYER", "claude-sonnet-4-20250514")
         self.model_quant = os.getenv("MAGNUS_MODEL_QUANT", "deepseek-reasoner")
+        # One pooled AsyncClient per event loop (consumer loop, scanner loop) – keep-alive instead of a TLS handshake per call
+        self._clients = weakref.WeakKeyDictionary()
+        self._clients_lock = threading.Lock()
+
+    def _client(self):
+        """Shared AsyncClient for the running loop, wrapped so `async with` doesn't close it."""
+        loop = asyncio.get_running_loop()
+        with self._clients_lock:
+            client = self._clients.get(loop)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(limits=httpx.Limits(max_connections=32, max_keepalive_connections=16))
+                self._clients[loop] = client
+        return contextlib.nullcontext(client)
+
+    async def aclose_client(self) -> None:
+        """Close the running loop's pooled client. Owners call this before stopping/closing their loop."""
+        loop = asyncio.get_running_loop()
+        with self._clients_lock:
+            client = self._clients.pop(loop, None)
+        if client is not None and not client.is_closed:
+            await client.aclose()
 
     async def _fetch_tavily(self, query: str, max_results: int = 5) -> str:
         """Fetches web/news from Tavily. Empty on error or missing key."""
@@ -83,7 +106,7 @@ class MagnusWarRoom:
         if not q:
             return ""
         try:
-            async with httpx.AsyncClient() as client:
+            async with self._client() as client:
                 resp = await client.post(
                     "https://api.tavily.com/search",
                     json={
@@ -118,7 +141,7 @@ class MagnusWarRoom:
         if not q:
             return ""
         try:
-            async with httpx.AsyncClient() as client:
+            async with self._client() as client:
                 resp = await client.get(
                     "https://newsapi.org/v2/everything",
                     params={"q": q, "apiKey": self.newsapi_key, "pageSize": max_results, "language": "en", "sortBy": "relevancy"},
@@ -182,7 +205,7 @@ class MagnusWarRoom:
         if not location or not target_date:
             return ""
         try:
-            async with httpx.AsyncClient() as client:
+            async with self._client() as client:
                 geo = await client.get(
                     "https://geocoding-api.open-meteo.com/v1/search",
                     params={"name": location, "count": 1},
@@ -281,14 +304,14 @@ class MagnusWarRoom:
             "temperature": 0.1
         }
         try:
-            async with httpx.AsyncClient() as client:
+            async with self._client() as client:
                 resp = await client.post(url, headers=headers, json=payload, timeout=12.0)
-                if resp.status_code != 200:
-                    body = resp.text
-                    if resp.status_code == 429 or "rate limit" in (body or "").lower() or "insufficient" in (body or "").lower():
-                        _print_block("   ⚠️ Bouncer API: rate limit or out of credits (Grok). PASS to avoid blocking.")
-                    return False
-                return "PASS" in (resp.json() or {}).get("choices", [{}])[0].get("message", {}).get("content", "").strip().upper()
+            if resp.status_code != 200:
+                body = resp.text
+                if resp.status_code == 429 or "rate limit" in (body or "").lower() or "insufficient" in (body or "").lower():
+                    _print_block("   ⚠️ Bouncer API: rate limit or out of credits (Grok). PASS to avoid blocking.")
+                return False
+            return "PASS" in (resp.json() or {}).get("choices", [{}])[0].get("message", {}).get("content", "").strip().upper()
         except httpx.TimeoutException:
             _print_block("   ⚠️ Bouncer API: timeout.")
             return False
@@ -317,7 +340,7 @@ class MagnusWarRoom:
             )}]
         }
         try:
-            async with httpx.AsyncClient() as client:
+            async with self._client() as client:
                 resp = await client.post(url, headers=headers, json=payload, timeout=20.0)
                 if resp.status_code != 200:
                     body = (resp.text or "").lower()
@@ -473,7 +496,7 @@ class MagnusWarRoom:
         }
         default_out = {"score": 5, "summary": "No scout data (API error or timeout)."}
         try:
-            async with httpx.AsyncClient() as client:
+            async with self._client() as client:
                 resp = await client.post(url, headers=headers, json=payload, timeout=20.0)
                 if resp.status_code != 200:
                     body = (resp.text or "").lower()
@@ -613,7 +636,7 @@ class MagnusWarRoom:
         max_attempts = 3
         for attempt in range(max_attempts):
             try:
-                async with httpx.AsyncClient() as client:
+                async with self._client() as client:
                     resp = await client.post(url, headers=headers, json={"model": self.model_quant, "messages": [{"role": "user", "content": prompt}]}, timeout=timeout_sec)
                     body = resp.json()
                     if resp.status_code >= 400 or body.get("error"):
@@ -746,11 +769,12 @@ class MagnusWarRoom:
     def _process_history(self, history_data: list) -> dict:
         """Computes stats from history to avoid pitfalls."""
         if not history_data: return {"high": 0, "low": 0, "avg": 0, "change_1h": 0}
+        # Histories are ~170 hourly points: builtin max/min/sum already reduce in C, no array library needed.
         prices = [float(h['p']) for h in history_data]
         old_p = prices[-12] if len(prices) > 12 else prices[0]
         return {
             "high": round(max(prices), 3), 
             "low": round(min(prices), 3), 
             "avg": round(sum(prices)/len(prices), 3), 
-            "change_1h": round(((prices[-1]-old_p)/old_p)*100, 1)
+            "change_1h": round(((prices[-1]-old_p)/old_p)*100, 1) if old_p > 0 else 0
         }
\ No newline at end of file